@@ -0,0 +1,295 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Headless benchmarks of the Shape Key Extras operators on synthetic meshes
+#
+#   blender -b --factory-startup --python benchmarks/benchmark.py -- --output bench.json
+#   blender -b --factory-startup --python benchmarks/benchmark.py -- --compare old.json
+#
+# Every fixture is a grid mesh with animated shape keys and vertex groups,
+# operators that change the key layout get a fresh fixture for each run.
+# Fixtures are built with plain bpy and the cases only call operators, so
+# an older version of the add-on can be measured with --addon as baseline
+
+import bpy
+import numpy as np
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ADDON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shape-key-extras.py")
+
+# name: (vertices, shape keys, vertex groups, animated frames)
+FIXTURES = {
+    "10k_10": (10000, 10, 8, 100),
+    "10k_500": (10000, 500, 8, 100),
+    "10k_2000": (10000, 2000, 8, 100),
+    "100k_100": (100000, 100, 16, 100),
+    "1m_10": (1000000, 10, 32, 100),
+}
+
+
+def load_addon(path):
+    spec = importlib.util.spec_from_file_location("shape_key_extras", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# -------------------------------------------------------------------
+#   Fixtures
+# -------------------------------------------------------------------
+
+def build_fixture(name, vert_count, key_count, group_count, frame_count, seed=0):
+    rng = np.random.RandomState(seed)
+    side = int(np.ceil(np.sqrt(vert_count)))
+
+    # grid of vertices connected by edges along both axes
+    grid = np.arange(vert_count)
+    co = np.zeros((vert_count, 3), dtype=np.float32)
+    co[:, 0], co[:, 1] = grid % side, grid // side
+    right = grid[(grid % side) < side - 1]
+    right = right[right + 1 < vert_count]
+    up = grid[grid + side < vert_count]
+    edges = np.concatenate((
+        np.column_stack((right, right + 1)),
+        np.column_stack((up, up + side)))).astype(np.int32)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(vert_count)
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    mesh.update()
+
+    ob = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(ob)
+    bpy.context.view_layer.objects.active = ob
+    ob.select_set(True)
+
+    # keys move a random patch of about 5% of the vertices
+    ob.shape_key_add(name="Basis", from_mix=False)
+    patch = max(1, vert_count // 20)
+    for k in range(key_count):
+        prefix = ("MOUTH_", "EYE_", "BROW_", "#")[k % 4]
+        key_block = ob.shape_key_add(name="%s%04d" % (prefix, k), from_mix=False)
+        start = rng.randint(0, max(1, vert_count - patch))
+        key_co = co.copy()
+        key_co[start:start + patch] += rng.normal(0, 0.05, (min(patch, vert_count - start), 3))
+        key_block.data.foreach_set("co", key_co.ravel())
+        key_block.value = rng.uniform()
+
+    # one action with a curve per key
+    key = mesh.shape_keys
+    key.animation_data_create()
+    key.animation_data.action = bpy.data.actions.new(name)
+    edit = bpy.context.preferences.edit
+    interpolation = edit.keyframe_new_interpolation_type
+    edit.keyframe_new_interpolation_type = 'LINEAR'
+    for key_block in key.key_blocks[1:]:
+        fc = key.animation_data.action.fcurves.new(key_block.path_from_id("value"))
+        for frame, value in enumerate(rng.uniform(0, 1, frame_count).tolist(), 1):
+            fc.keyframe_points.insert(frame, value, options={'FAST'})
+        fc.update()
+    edit.keyframe_new_interpolation_type = interpolation
+
+    # weights in steps of 0.01, one add() call per weight
+    for g in range(group_count):
+        vgroup = ob.vertex_groups.new(name="Group_%02d" % g)
+        members = rng.choice(vert_count, size=max(1, vert_count // 4), replace=False)
+        weights = rng.randint(1, 101, len(members))
+        for weight in np.unique(weights).tolist():
+            vgroup.add(members[weights == weight].tolist(), weight / 100, 'REPLACE')
+
+    return ob
+
+def remove_fixture(ob):
+    mesh = ob.data
+    key = mesh.shape_keys
+    action = key.animation_data.action if key and key.animation_data else None
+    bpy.data.objects.remove(ob)
+    bpy.data.meshes.remove(mesh)
+    if action is not None:
+        bpy.data.actions.remove(action)
+
+
+# -------------------------------------------------------------------
+#   Cases
+# -------------------------------------------------------------------
+
+def case_selection_cold(context, ob):
+    # the same keys in a different order, so a cached selection is not reused
+    ske = context.scene.shape_key_extras
+    ske.sk_only = "EYE_, MOUTH_" if ske.sk_only == "MOUTH_, EYE_" else "MOUTH_, EYE_"
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        bpy.ops.shapekeyextras.print_shape_key_selection()
+    ske.sk_only = ""
+
+def case_selection_warm(context, ob):
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        bpy.ops.shapekeyextras.print_shape_key_selection()
+
+def operator_case(name, **properties):
+    def case(context, ob):
+        getattr(bpy.ops.shapekeyextras, name)(**properties)
+    return case
+
+def case_merge_vertex_groups(context, ob):
+    collection = context.scene.shape_key_extras_collection
+    collection.clear()
+    for vgroup in ob.vertex_groups[:4]:
+        collection.add().name = vgroup.name
+    bpy.ops.shapekeyextras.merge_vg_ui_list()
+
+def case_move(context, ob):
+    ob.active_shape_key_index = 1
+    bpy.ops.shapekeyextras.move_shapekey(action='BOTTOM')
+
+# name: (case, needs a fresh fixture for every run)
+CASES = (
+    ("selection_cold", case_selection_cold, False),
+    ("selection_warm", case_selection_warm, False),
+    ("enable_all", operator_case("enable_all"), False),
+    ("disable_all", operator_case("disable_all"), False),
+    ("toggle_mute", operator_case("toggle_mute"), False),
+    ("random_visibility", operator_case("random_visibility"), False),
+    ("set_values", operator_case("set_values"), False),
+    ("randomize", operator_case("randomize"), False),
+    ("set_range", operator_case("set_range"), False),
+    ("insert_keyframe", operator_case("insert_keyframe"), False),
+    ("bake_keyframes", operator_case("bake_keyframes", frame_start=1, frame_end=100), True),
+    ("bake_random", operator_case("bake_random", frame_start=1, frame_end=100, smoothing=5), True),
+    ("delete_all_keyframes", operator_case("delete_all_keyframes"), True),
+    ("delete_all_keyframes_range", operator_case("delete_all_keyframes", use_frame_range=True), True),
+    ("move_shapekey", case_move, True),
+    ("sort_shapekeys_name", operator_case("sort_shapekeys", sort_by='NAME'), True),
+    ("sort_shapekeys_value", operator_case("sort_shapekeys", sort_by='VALUE'), True),
+    ("scale_deltas", operator_case("scale_deltas", factor=0.5), False),
+    ("smooth_deltas", operator_case("smooth_deltas", iterations=5), False),
+    ("blend_shapekeys", operator_case("blend_shapekeys"), True),
+    ("analyze_shapekeys", operator_case("analyze_shapekeys"), False),
+    ("split_shapekeys_side", operator_case("split_shapekeys", mode='SIDE', falloff=1.0), True),
+    ("bake_mix_key", operator_case("bake_mix", mode='NEW_KEY'), True),
+    ("merge_vertex_groups", case_merge_vertex_groups, True),
+    ("remove_selection", operator_case("remove_selection"), True),
+)
+
+
+# -------------------------------------------------------------------
+#   Runner
+# -------------------------------------------------------------------
+
+def run(args):
+    ske_module = load_addon(args.addon)
+    ske_module.register()
+    context = bpy.context
+    context.scene.frame_start, context.scene.frame_end = 1, 100
+
+    # start from an empty file
+    for ob in list(bpy.data.objects):
+        bpy.data.objects.remove(ob)
+
+    results = []
+    for fixture in args.fixtures:
+        verts, keys, groups, frames = FIXTURES[fixture]
+        print("Fixture %s: %s vertices, %s shape keys" % (fixture, verts, keys))
+        ob = build_fixture(fixture, verts, keys, groups, frames)
+
+        for name, case, rebuild in CASES:
+            if args.cases and name not in args.cases:
+                continue
+
+            times = []
+            try:
+                for run_index in range(args.repeat):
+                    if rebuild:
+                        remove_fixture(ob)
+                        ob = build_fixture(fixture, verts, keys, groups, frames)
+                    start = time.perf_counter()
+                    case(context, ob)
+                    times.append(time.perf_counter() - start)
+            except (AttributeError, KeyError, RuntimeError, TypeError) as e:
+                # operators or options this version of the add-on lacks
+                print("  %-28s skipped (%s)" % (name, e))
+                continue
+
+            results.append({
+                "fixture": fixture,
+                "vertices": verts,
+                "shape_keys": keys,
+                "case": name,
+                "times": times,
+                "min": min(times),
+                "median": statistics.median(times),
+                })
+            print("  %-28s %10.4fs" % (name, min(times)))
+
+        remove_fixture(ob)
+
+    ske_module.unregister()
+    return {
+        "addon_version": ".".join(map(str, ske_module.bl_info["version"])),
+        "blender": bpy.app.version_string,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "results": results,
+        }
+
+def compare(report, baseline):
+    # ratio > 1 means slower than the baseline
+    reference = {(r["fixture"], r["case"]): r["min"] for r in baseline["results"]}
+    print("\nCompared to %s (Blender %s)" % (baseline["addon_version"], baseline["blender"]))
+    for r in report["results"]:
+        before = reference.get((r["fixture"], r["case"]))
+        if before:
+            print("  %-10s %-28s %7.2fx" % (r["fixture"], r["case"], r["min"] / before))
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b --factory-startup --python benchmarks/benchmark.py --",
+        description="Benchmark the Shape Key Extras operators")
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES), choices=list(FIXTURES))
+    parser.add_argument("--cases", nargs="+", default=[], choices=[c[0] for c in CASES])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--addon", default=ADDON_PATH, help="Add-on file to benchmark")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", default="", help="Earlier output to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to %s" % args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
@@ -28,7 +28,21 @@ bl_info = {
 }
 
 import bpy
-import random
+import numpy as np
+
+import ast
+import base64
+import fnmatch
+import functools
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+
+from collections import Counter, deque, namedtuple
 
 from bpy.props import (IntProperty,
                        BoolProperty,
@@ -45,57 +59,1516 @@ from bpy.types import (Operator,
                        PropertyGroup
                        )
 
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+# -------------------------------------------------------------------
+#   Profiling    
+# -------------------------------------------------------------------
+
+# counters of the operators currently running, the innermost is last
+_profile_stack = []
+_profile_records = deque(maxlen=20)
+_profile_logger = None
+
+
+def profile_count(name, amount=1):
+    if _profile_stack:
+        counters = _profile_stack[-1]
+        counters[name] = counters.get(name, 0) + amount
+
+def profile_writes(elements, calls=1):
+    # calls that write to RNA and the number of values they write, a
+    # single property assignment is one call writing one value
+    profile_count("rna_writes", calls)
+    profile_count("rna_elements", int(elements))
+
+def profile_log_path():
+    return os.path.join(bpy.utils.user_resource('CONFIG'), "shape_key_extras.log")
+
+def profile_logger():
+    global _profile_logger
+    if _profile_logger is None:
+        import logging
+        from logging.handlers import RotatingFileHandler
+        
+        path = profile_log_path()
+        logger = logging.getLogger("shape_key_extras")
+        # the logger is global, a reloaded module finds the old handler
+        if not any(isinstance(h, RotatingFileHandler) and h.baseFilename == os.path.abspath(path) 
+                for h in logger.handlers):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=1024 * 1024, backupCount=3)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _profile_logger = logger
+    return _profile_logger
+
+def close_profile_logger():
+    global _profile_logger
+    import logging
+    logger = logging.getLogger("shape_key_extras")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    _profile_logger = None
+
+def profiled(execute):
+    # records time, keys touched, rna writes and nested operator
+    # calls of an execute method if profiling is enabled
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        if not context.scene.shape_key_extras.sk_profile:
+            return execute(self, context)
+        
+        counters = {"keys": 0, "rna_writes": 0, "rna_elements": 0, "ops": 0, "selection_time": 0.0}
+        _profile_stack.append(counters)
+        result = None
+        start = time.perf_counter()
+        try:
+            result = execute(self, context)
+        finally:
+            _profile_stack.pop()
+            record = {"operator": self.bl_idname, 
+                      "time": time.perf_counter() - start,
+                      "result": sorted(result) if result else ['ERROR']}
+            record.update(counters)
+            _profile_records.appendleft(record)
+            try:
+                profile_logger().info(json.dumps(record))
+            except OSError:
+                pass
+        return result
+    return wrapper
+
 # -------------------------------------------------------------------
 #   Helper    
 # -------------------------------------------------------------------
 
-def search_chars(char_sequence, name):
-    if char_sequence:
+# Compiled form of the selection settings, hashable so it can be part
+# of the cache signature below
+SelectionFilter = namedtuple("SelectionFilter", ("exclude", "only", "state", "source", "set_name"))
+
+# key datablock pointer -> (signature, indices)
+_selection_cache = {}
+_selection_cache_size = 64
+
+# stored selection set and key block names -> (mask, missing)
+_selection_set_cache = {}
+
+# key datablock pointer -> (signature, (flags, order)) of the shape key list
+_list_filter_cache = {}
+
+# key datablock pointer -> (key blocks, matches, first names) shown in 
+# the panel, cleared by the message bus subscriptions and the write helpers
+_preview_cache = {}
+_preview_size = 5
+_msgbus_owner = object()
+
+
+def compile_char_sequence(char_sequence):
+    # "Basis, #, *" -> ('Basis', '#', '*'), empty items are dropped
+    return tuple(i.strip() for i in char_sequence.split(",") if i.strip())
+
+def compile_selection(ske):
+    return SelectionFilter(
+        exclude = compile_char_sequence(ske.sk_exclude),
+        only = compile_char_sequence(ske.sk_only),
+        state = ske.sk_selection,
+        source = ske.sk_source,
+        set_name = ske.sk_set_name
+        )
+
+def key_blocks_get(key_blocks, attr, dtype=np.float32):
+    buffer = np.empty(len(key_blocks), dtype=dtype)
+    key_blocks.foreach_get(attr, buffer)
+    return buffer
+
+def match_names(names, char_tuple):
+    return np.fromiter(
+        (n.startswith(char_tuple) or n.endswith(char_tuple) for n in names), 
+        dtype=bool, count=len(names))
+
+def key_block_ids(names):
+    # crc32 of the names, the keys keep their id when they are moved
+    return np.fromiter((zlib.crc32(n.encode("utf-8")) for n in names), 
+        dtype=np.uint32, count=len(names))
+
+def layout_id(names):
+    return "%08x" % zlib.crc32("\0".join(names).encode("utf-8"))
+
+def selection_set_mask(selection_set, names):
+    # the set is a bitset over the key blocks, packed and base64 encoded,
+    # together with an id of the key block layout it was stored for and 
+    # the ids of its members. If the layout changed since, the members 
+    # are found by id, members that were renamed or removed are dropped.
+    # Returns the (read-only) mask over names and the number of members 
+    # not found
+    if selection_set is None or not selection_set.bits:
+        return np.zeros(len(names), dtype=bool), 0
+    names = tuple(names)
+    signature = (selection_set.bits, selection_set.size, selection_set.layout, 
+        selection_set.members, names)
+    cached = _selection_set_cache.get(signature)
+    if cached is not None:
+        return cached
+    
+    missing = 0
+    if not selection_set.layout or selection_set.layout == layout_id(names):
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(selection_set.bits), 
+            dtype=np.uint8))[:selection_set.size].astype(bool)
+        mask = np.zeros(len(names), dtype=bool)
+        size = min(len(bits), len(names))
+        mask[:size] = bits[:size]
+    else:
+        members = np.frombuffer(base64.b64decode(selection_set.members), dtype=np.uint32)
+        ids = key_block_ids(names)
+        mask = np.isin(ids, members)
+        missing = len(members) - np.count_nonzero(np.isin(members, ids))
+    
+    mask.flags.writeable = False
+    if len(_selection_set_cache) >= _selection_cache_size:
+        del _selection_set_cache[next(iter(_selection_set_cache))]
+    _selection_set_cache[signature] = (mask, missing)
+    return mask, missing
+
+def store_selection_set(selection_set, mask, names):
+    selection_set.bits = base64.b64encode(np.packbits(mask).tobytes()).decode("ascii")
+    selection_set.size = len(mask)
+    selection_set.layout = layout_id(names)
+    members = key_block_ids(names)[np.asarray(mask, dtype=bool)]
+    selection_set.members = base64.b64encode(members.tobytes()).decode("ascii")
+    invalidate_selection_preview(selection_set.id_data)
+
+def remap_selection_sets(key):
+    # store the sets against the current layout, called by the add-on
+    # after it removed or moved keys, other changes are resolved by id
+    names = key.key_blocks.keys()
+    for selection_set in key.shape_key_extras_sets:
+        store_selection_set(selection_set, selection_set_mask(selection_set, names)[0], names)
+
+def select_key_blocks(key, selection, skip_reference=False):
+    start = time.perf_counter()
+    key_blocks = key.key_blocks
+    names = tuple(key_blocks.keys())
+    
+    # the mute states only matter when filtering by state
+    mute = None
+    if selection.state != 'ALL':
+        mute = key_blocks_get(key_blocks, "mute", bool)
+    
+    selection_set = None
+    if selection.source == 'SET':
+        selection_set = key.shape_key_extras_sets.get(selection.set_name)
+    
+    signature = (selection, names, None if mute is None else mute.tobytes(),
+        None if selection_set is None else (selection_set.bits, selection_set.layout, selection_set.members))
+    cache_id = key.as_pointer()
+    cached = _selection_cache.get(cache_id)
+    
+    if cached is not None and cached[0] == signature:
+        indices = cached[1]
+    else:
+        if selection.source == 'SET':
+            mask = selection_set_mask(selection_set, names)[0].copy()
+        elif selection.only:
+            mask = match_names(names, selection.only)
+        elif selection.exclude:
+            mask = ~match_names(names, selection.exclude)
+        else:
+            mask = np.ones(len(names), dtype=bool)
         
-        if char_sequence.endswith(','):
-            char_sequence = char_sequence[:-1]
-        if char_sequence.startswith(','):
-            char_sequence = char_sequence[-1:]
-            
-        char_list = [i.strip() for i in char_sequence.split(",")]
-        if name.startswith(tuple(char_list)) or name.endswith(tuple(char_list)):
-            return True
-        else: 
-            return False
-    else: 
-        return False
+        if selection.state == 'ENABLED':
+            mask &= ~mute
+        elif selection.state == 'DISABLED':
+            mask &= mute
+        
+        indices = np.flatnonzero(mask)
+        indices.flags.writeable = False
+        
+        _selection_cache.pop(cache_id, None)
+        if len(_selection_cache) >= _selection_cache_size:
+            del _selection_cache[next(iter(_selection_cache))]
+        _selection_cache[cache_id] = (signature, indices)
+    
+    # the reference key (Basis) is always the first key block
+    if skip_reference:
+        indices = indices[indices != 0]
+    profile_count("selection_time", time.perf_counter() - start)
+    return indices
 
-def shape_key_selection(op, context):
-    scn = context.scene
-    ske = scn.shape_key_extras
-    shape_key_names = []
-    
-    if not ske.sk_only:
-        for shapekey in context.object.data.shape_keys.key_blocks:
-            exclude_char = search_chars(ske.sk_exclude, shapekey.name)
-            if exclude_char is not True:
-                if ske.sk_selection == 'ALL':
-                    shape_key_names.append(shapekey.name)
-                if ske.sk_selection == 'ENABLED':
-                    if shapekey.mute is False:
-                        shape_key_names.append(shapekey.name)
-                if ske.sk_selection == 'DISABLED':
-                    if shapekey.mute is True:
-                        shape_key_names.append(shapekey.name)                  
+def shape_key_selection(op, context, skip_reference=False):
+    selection = compile_selection(context.scene.shape_key_extras)
+    return select_key_blocks(context.object.data.shape_keys, selection, skip_reference)
+
+def shape_key_targets(context):
+    # (object, key) pairs in scope, objects sharing a key are only
+    # returned once
+    scope = context.scene.shape_key_extras.sk_scope
+    if scope == 'ACTIVE':
+        objects = [context.object] if context.object else []
+    elif scope == 'SELECTED':
+        objects = context.selected_objects
+    elif scope == 'COLLECTION':
+        objects = context.view_layer.active_layer_collection.collection.all_objects
     else:
-        for shapekey in context.object.data.shape_keys.key_blocks:
-            only_char = search_chars(ske.sk_only, shapekey.name)
-            if only_char is True:
-                if ske.sk_selection == 'ALL':
-                    shape_key_names.append(shapekey.name)
-                if ske.sk_selection == 'ENABLED':
-                    if shapekey.mute is False:
-                        shape_key_names.append(shapekey.name)
-                if ske.sk_selection == 'DISABLED':
-                    if shapekey.mute is True:
-                        shape_key_names.append(shapekey.name)    
-                
-    return shape_key_names
+        objects = context.scene.objects
+    
+    # curves and lattices have shape keys too, the helpers expect meshes
+    targets, keys = [], set()
+    for ob in objects:
+        if ob.type != 'MESH':
+            continue
+        key = ob.data.shape_keys
+        if key is not None and key.as_pointer() not in keys:
+            keys.add(key.as_pointer())
+            targets.append((ob, key))
+    return targets
+
+def shape_key_selections(op, context, skip_reference=False):
+    # the filter is compiled once for all targets
+    selection = compile_selection(context.scene.shape_key_extras)
+    targets = [(ob, key, select_key_blocks(key, selection, skip_reference)) 
+        for ob, key in shape_key_targets(context)]
+    profile_count("keys", sum(len(indices) for ob, key, indices in targets))
+    return targets
+
+def shape_key_names(key, indices):
+    names = key.key_blocks.keys()
+    return [names[i] for i in indices]
+
+def key_blocks_set(key_blocks, attr, indices, values, dtype=np.float32):
+    # read all, change the selected ones and write all back in one go
+    buffer = key_blocks_get(key_blocks, attr, dtype)
+    buffer[indices] = values
+    key_blocks.foreach_set(attr, buffer)
+    invalidate_selection_preview(key_blocks.id_data)
+    profile_writes(len(buffer))
+    return buffer
+
+def tag_shape_key_update(key):
+    # foreach_set bypasses the rna update callbacks (and the message bus)
+    key.update_tag()
+    if key.user:
+        key.user.update_tag()
+    invalidate_selection_preview(key)
+
+def invalidate_selection_preview(key):
+    # the subscriptions below only see changes made through the UI,
+    # the helpers writing with foreach_set call this instead
+    _preview_cache.pop(key.as_pointer(), None)
+
+def clear_selection_preview(*args):
+    _preview_cache.clear()
+
+def selection_preview(context, key):
+    # the length check catches keys added or removed by other tools
+    entry = _preview_cache.get(key.as_pointer())
+    if entry is None or entry[0] != len(key.key_blocks):
+        indices = select_key_blocks(key, compile_selection(context.scene.shape_key_extras))
+        entry = (len(key.key_blocks), len(indices), shape_key_names(key, indices[:_preview_size]))
+        _preview_cache[key.as_pointer()] = entry
+    return entry
+
+def subscribe_selection_preview():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    subscriptions = [(bpy.types.ShapeKey, "name"), (bpy.types.ShapeKey, "mute")]
+    subscriptions += [(SKE_PG_sceneSettings, p) for p in 
+        ("sk_exclude", "sk_only", "sk_selection", "sk_source", "sk_set_name")]
+    subscriptions += [(SKE_PG_selectionSet, "bits")]
+    for key in subscriptions:
+        bpy.msgbus.subscribe_rna(key=key, owner=_msgbus_owner, args=(), 
+            notify=clear_selection_preview)
+
+@bpy.app.handlers.persistent
+def selection_preview_handler(dummy):
+    # subscriptions do not survive loading a file, undo restores old states
+    clear_selection_preview()
+    subscribe_selection_preview()
+
+def set_shape_key_mute(key, indices, mode, states=None):
+    key_blocks = key.key_blocks
+    mute = key_blocks_get(key_blocks, "mute", bool)
+    if mode == 'ENABLE':
+        mute[indices] = False
+    elif mode == 'DISABLE':
+        mute[indices] = True
+    elif mode == 'TOGGLE':
+        mute[indices] = ~mute[indices]
+    else:
+        mute[indices] = states
+    key_blocks.foreach_set("mute", mute)
+    invalidate_selection_preview(key)
+    profile_writes(len(mute))
+
+def set_shape_key_values(key, indices, values):
+    key_blocks_set(key.key_blocks, "value", indices, values)
+
+def set_shape_key_range(key, indices, slider_min, slider_max):
+    key_blocks = key.key_blocks
+    # slider_min and slider_max clamp each other, so open up the
+    # maximum before the minimum is assigned
+    key_blocks_set(key_blocks, "slider_max", indices, 10.0)
+    key_blocks_set(key_blocks, "slider_min", indices, slider_min)
+    key_blocks_set(key_blocks, "slider_max", indices, slider_max)
+
+def random_generator(ske):
+    # RandomState gives the same sequence for a seed on every numpy version,
+    # seed 0 draws fresh entropy so every run differs
+    return np.random.RandomState(ske.sk_random_seed or None)
+
+def random_weights(key, indices):
+    # largest offset of each key relative to the largest in selection, 
+    # unlike the value it is not changed by randomizing
+    weights = np.zeros(len(indices), dtype=np.float32)
+    for row, (i, base, deltas) in enumerate(shape_key_deltas(key.key_blocks, indices)):
+        if len(deltas):
+            weights[row] = np.sqrt(np.einsum("ij,ij->i", deltas, deltas).max())
+    peak = weights.max() if len(weights) else 0
+    return weights / peak if peak > 0 else np.ones(len(indices), dtype=np.float32)
+
+def random_shape_key_values(key, indices, ske, rng, frames=1):
+    # frames x keys matrix within sk_random_min and sk_random_max
+    low, high = ske.sk_random_min, ske.sk_random_max
+    shape = (frames, len(indices))
+    if ske.sk_random_distribution == 'NORMAL':
+        values = rng.normal((low + high) * 0.5, abs(high - low) / 6.0, shape)
+        values = np.clip(values, min(low, high), max(low, high))
+    else:
+        values = rng.uniform(low, high, shape)
+        if ske.sk_random_distribution == 'WEIGHTED':
+            values = low + (values - low) * random_weights(key, indices)
+    return values.astype(np.float32)
+
+def random_shape_key_mute(key, indices, ske, rng):
+    # the chance for a key to be enabled is 0.5 or its weight
+    chance = np.full(len(indices), 0.5)
+    if ske.sk_random_distribution == 'WEIGHTED':
+        chance = random_weights(key, indices)
+    return rng.random_sample(len(indices)) >= chance
+
+def smooth_values(values, window):
+    # moving average over the rows (frames), edges are padded
+    if window < 2:
+        return values
+    padded = np.pad(values, ((window // 2, window - 1 - window // 2), (0, 0)), mode='edge')
+    summed = np.cumsum(padded, axis=0, dtype=np.float64)
+    summed = np.vstack((np.zeros((1, values.shape[1])), summed))
+    return ((summed[window:] - summed[:-window]) / window).astype(np.float32)
+
+def remove_shape_keys(ob, indices):
+    key = ob.data.shape_keys
+    key_blocks = key.key_blocks
+    count = len(key_blocks)
+    removed = np.zeros(count, dtype=bool)
+    removed[indices] = True
+    
+    if removed.all():
+        # the sets are emptied as well, other users may keep the datablock
+        for selection_set in key.shape_key_extras_sets:
+            store_selection_set(selection_set, np.zeros(0, dtype=bool), [])
+        ob.shape_key_clear()
+        profile_writes(1)
+        return count
+    
+    # blender remaps keys relative to a removed key to the reference key,
+    # redirect them to the closest surviving ancestor instead
+    blocks = key_blocks[:]
+    lookup = {kb.name: i for i, kb in enumerate(blocks)}
+    relative = [lookup[kb.relative_key.name] for kb in blocks]
+    reference = blocks[int(np.argmin(removed))]
+    
+    relative_fix = {}
+    for i in np.flatnonzero(~removed).tolist():
+        r, visited = relative[i], {i}
+        while removed[r] and r not in visited:
+            visited.add(r)
+            r = relative[r]
+        if r != relative[i]:
+            relative_fix[blocks[i].name] = reference.name if removed[r] else blocks[r].name
+    
+    # remove from the bottom up, the reference key goes last
+    active_index = ob.active_shape_key_index
+    for i in np.flatnonzero(removed)[::-1].tolist():
+        ob.shape_key_remove(blocks[i])
+    profile_writes(np.count_nonzero(removed), np.count_nonzero(removed))
+    invalidate_selection_preview(key)
+    
+    for name, relative_name in relative_fix.items():
+        key_blocks[name].relative_key = key_blocks[relative_name]
+    profile_writes(len(relative_fix), len(relative_fix))
+    remap_selection_sets(key)
+    
+    # keep the active key or fall back to the closest one above
+    new_index = int(np.count_nonzero(~removed[:active_index]))
+    if active_index < count and removed[active_index]:
+        new_index -= 1
+    ob.active_shape_key_index = max(new_index, 0)
+    profile_writes(1)
+    return len(indices)
+
+def key_block_coords(key_block):
+    co = np.empty(len(key_block.data) * 3, dtype=np.float32)
+    key_block.data.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def key_block_deltas(key_block):
+    return key_block_coords(key_block) - key_block_coords(key_block.relative_key)
+
+def call_object_operator(ob, operator, **kwargs):
+    # run an operator on the given object instead of the active one
+    profile_count("ops")
+    if hasattr(bpy.context, "temp_override"):
+        with bpy.context.temp_override(object=ob):
+            return operator(**kwargs)
+    return operator({'object': ob}, **kwargs)
+
+def plan_shape_key_move(count, index, target, use_relative=True):
+    # shortest sequence of shape_key_move types from index to target,
+    # TOP lands right below the reference key of relative keys and on
+    # the first slot for absolute keys
+    if index == target:
+        return []
+    moves = ['DOWN' if target > index else 'UP'] * abs(target - index)
+    top = 1 if use_relative else 0
+    if index > top and target >= top:
+        for plan in (['TOP'] + ['DOWN'] * (target - top),
+                     ['BOTTOM'] + ['UP'] * (count - 1 - target)):
+            if len(plan) < len(moves):
+                moves = plan
+    return moves
+
+def move_shape_key(ob, index, target):
+    key = ob.data.shape_keys
+    count = len(key.key_blocks)
+    ob.active_shape_key_index = index
+    for move in plan_shape_key_move(count, index, target, key.use_relative):
+        call_object_operator(ob, bpy.ops.object.shape_key_move, type=move)
+    
+    new_index = ob.active_shape_key_index
+    remap_selection_sets(key)
+    return new_index
+
+def reorder_shape_keys(ob, order):
+    # order lists the current indices in their new order, the reference
+    # key stays in place. The longest run of keys that are already in
+    # order is kept, everything before it is moved to the top and 
+    # everything after it to the bottom, which is the minimum of moves.
+    # TOP moves absolute keys above the reference key, so the reference
+    # key is moved to the top after them
+    key_blocks = ob.data.shape_keys.key_blocks
+    top = 1 if ob.data.shape_keys.use_relative else 0
+    order = np.asarray(order)
+    count = len(order)
+    if count < 3 or order[0] != 0:
+        return 0
+
+    breaks = np.flatnonzero(np.diff(order[1:]) < 0) + 2
+    starts = np.concatenate(([1], breaks))
+    ends = np.concatenate((breaks, [count]))
+    longest = int(np.argmax(ends - starts))
+    first, last = int(starts[longest]), int(ends[longest])
+
+    names = key_blocks.keys()
+    active_name = ob.active_shape_key.name if ob.active_shape_key else None
+    moves = 0
+    for rank in range(first - 1, top - 1, -1):
+        index = key_blocks.find(names[order[rank]])
+        if index != top:
+            ob.active_shape_key_index = index
+            call_object_operator(ob, bpy.ops.object.shape_key_move, type='TOP')
+            moves += 1
+    for rank in range(last, count):
+        index = key_blocks.find(names[order[rank]])
+        if index != count - 1:
+            ob.active_shape_key_index = index
+            call_object_operator(ob, bpy.ops.object.shape_key_move, type='BOTTOM')
+            moves += 1
+
+    if active_name is not None:
+        ob.active_shape_key_index = key_blocks.find(active_name)
+    remap_selection_sets(ob.data.shape_keys)
+    invalidate_selection_preview(ob.data.shape_keys)
+    return moves
+
+def sort_shape_keys(ob, indices, sort_by='NAME', reverse=False):
+    # sort the given keys among the slots they already occupy
+    key_blocks = ob.data.shape_keys.key_blocks
+    indices = np.sort(indices[indices != 0])
+    if sort_by == 'NAME':
+        names = key_blocks.keys()
+        ranking = sorted(range(len(indices)), key=lambda i: names[indices[i]].lower())
+    else:
+        if sort_by == 'VALUE':
+            values = key_blocks_get(key_blocks, "value")[indices]
+        else:
+            # meshes without vertices have no offsets to compare
+            values = np.zeros(len(indices))
+            if len(ob.data.vertices):
+                values = np.array([np.linalg.norm(key_block_deltas(key_blocks[i]), axis=1).max()
+                    for i in indices.tolist()])
+        ranking = np.argsort(values, kind='stable')
+    
+    if reverse:
+        ranking = ranking[::-1]
+    order = np.arange(len(key_blocks))
+    order[indices] = indices[np.asarray(ranking, dtype=np.int64)]
+    return reorder_shape_keys(ob, order)
+
+# KeyFrame.interpolation as used by foreach_set
+fcurve_interpolation = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+def shape_key_fcurves(key, create=False):
+    anim = key.animation_data
+    if anim is None:
+        if not create:
+            return None
+        anim = key.animation_data_create()
+    
+    action = anim.action
+    if action is None:
+        if not create:
+            return None
+        action = bpy.data.actions.new(name="%sAction" % key.name)
+        anim.action = action
+    
+    if hasattr(action, "fcurves"):
+        return action.fcurves
+    
+    # layered actions, the curves live in the channelbag of the slot
+    from bpy_extras import anim_utils
+    if create:
+        if anim.action_slot is None:
+            anim.action_slot = action.slots.new(id_type='KEY', name=key.name)
+        return anim_utils.action_ensure_channelbag_for_slot(action, anim.action_slot).fcurves
+    
+    channelbag = anim_utils.action_get_channelbag_for_slot(action, anim.action_slot)
+    return channelbag.fcurves if channelbag else None
+
+def shape_key_fcurve_lookup(key, fcurves, indices, attr="value"):
+    # data_path index of the curves, returns (key index, fcurve) pairs
+    curves = {fc.data_path: fc for fc in fcurves if fc.data_path.startswith("key_blocks[")}
+    key_blocks = key.key_blocks
+    lookup = []
+    for i in indices.tolist():
+        fc = curves.get(key_blocks[i].path_from_id(attr))
+        if fc is not None:
+            lookup.append((i, fc))
+    return lookup
+
+def fcurve_point_frames(fcurve):
+    co = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+    fcurve.keyframe_points.foreach_get("co", co)
+    return co[0::2]
+
+# Keyframe properties copied when the points of a curve are rebuilt
+keyframe_point_attributes = (
+    ("co", np.float32, 2),
+    ("handle_left", np.float32, 2),
+    ("handle_right", np.float32, 2),
+    ("handle_left_type", np.int32, 1),
+    ("handle_right_type", np.int32, 1),
+    ("interpolation", np.int32, 1),
+    ("easing", np.int32, 1),
+    ("type", np.int32, 1),
+    ("back", np.float32, 1),
+    ("amplitude", np.float32, 1),
+    ("period", np.float32, 1),
+    ("select_control_point", bool, 1),
+    ("select_left_handle", bool, 1),
+    ("select_right_handle", bool, 1),
+    )
+
+def remove_fcurve_points(fcurve, frame_start, frame_end, keep_curve=False):
+    # returns True if the curve is (or would be) empty, if every point is
+    # in range they are kept unless keep_curve is set, the caller is 
+    # expected to remove the whole curve instead
+    frames = fcurve_point_frames(fcurve)
+    hits = np.flatnonzero((frames >= frame_start) & (frames <= frame_end))
+    if len(hits) == len(frames) and not keep_curve:
+        return True
+    
+    if not len(hits):
+        return not len(frames)
+    
+    # read the points that are kept, rebuild the curve with them
+    points = fcurve.keyframe_points
+    keep = np.ones(len(frames), dtype=bool)
+    keep[hits] = False
+    kept = {}
+    for attr, dtype, size in keyframe_point_attributes:
+        buffer = np.empty(len(frames) * size, dtype=dtype)
+        points.foreach_get(attr, buffer)
+        kept[attr] = buffer.reshape(-1, size)[keep].ravel()
+    
+    count = int(np.count_nonzero(keep))
+    if hasattr(points, "clear"):
+        points.clear()
+        points.add(count)
+        profile_writes(count, 2)
+    else:
+        # older versions can only remove points one by one
+        for i in range(len(frames) - 1, count - 1, -1):
+            points.remove(points[i], fast=True)
+        profile_writes(len(hits), len(hits))
+    for attr, buffer in kept.items():
+        points.foreach_set(attr, buffer)
+        profile_writes(len(buffer))
+    fcurve.update()
+    return not count
+
+def write_fcurve_points(fcurve, frames, values, interpolation='BEZIER'):
+    # replaces the points in the range of frames, all new points are
+    # allocated at once and filled by foreach_set
+    remove_fcurve_points(fcurve, frames[0], frames[-1], keep_curve=True)
+    points = fcurve.keyframe_points
+    start = len(points)
+    points.add(len(frames))
+    profile_writes(len(frames))
+
+    co = np.empty(len(points) * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    co[start * 2::2] = frames
+    co[start * 2 + 1::2] = values
+    for attr in ("co", "handle_left", "handle_right"):
+        points.foreach_set(attr, co)
+        profile_writes(len(co))
+
+    mode = np.empty(len(points), dtype=np.int32)
+    points.foreach_get("interpolation", mode)
+    mode[start:] = fcurve_interpolation[interpolation]
+    points.foreach_set("interpolation", mode)
+    profile_writes(len(mode))
+    fcurve.update()
+
+def decimate_values(frames, values, tolerance):
+    # Ramer-Douglas-Peucker, linear interpolation of the kept points 
+    # stays within the tolerance of all values
+    keep = np.zeros(len(values), dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, len(values) - 1)]
+    while segments:
+        a, b = segments.pop()
+        if b - a < 2:
+            continue
+        t = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        error = np.abs(values[a + 1:b] - (values[a] + t * (values[b] - values[a])))
+        m = int(np.argmax(error))
+        if error[m] > tolerance:
+            keep[a + 1 + m] = True
+            segments += [(a, a + 1 + m), (a + 1 + m, b)]
+    return keep
+
+def bake_shape_key_values(key, indices, frames, values, interpolation='BEZIER', tolerance=None):
+    # values is a frames x keys matrix, optionally decimated per key.
+    # Decimation is only exact for linear interpolation
+    fcurves = shape_key_fcurves(key, create=True)
+    existing = dict(shape_key_fcurve_lookup(key, fcurves, indices))
+    key_blocks = key.key_blocks
+    for column, i in enumerate(indices.tolist()):
+        fc = existing.get(i)
+        if fc is None:
+            fc = fcurves.new(key_blocks[i].path_from_id("value"))
+        if tolerance is None or interpolation != 'LINEAR' or len(frames) < 3:
+            write_fcurve_points(fc, frames, values[:, column], interpolation)
+        else:
+            # clear the whole range, the decimated points may not span it
+            remove_fcurve_points(fc, frames[0], frames[-1], keep_curve=True)
+            keep = decimate_values(frames, values[:, column], tolerance)
+            write_fcurve_points(fc, frames[keep], values[keep, column], interpolation)
+
+def sample_shape_key_values(context, targets, frames):
+    # steps through the frames once and returns a frames x keys matrix
+    # of the evaluated values for each (key, indices) pair
+    scene = context.scene
+    frame_current, subframe = scene.frame_current, scene.frame_subframe
+    depsgraph = context.evaluated_depsgraph_get()
+    samples = [np.empty((len(frames), len(indices)), dtype=np.float32) 
+        for key, indices in targets]
+    
+    for row, frame in enumerate(frames.tolist()):
+        scene.frame_set(int(frame), subframe=frame - int(frame))
+        for (key, indices), values in zip(targets, samples):
+            key_blocks = key.evaluated_get(depsgraph).key_blocks
+            values[row] = key_blocks_get(key_blocks, "value")[indices]
+    
+    scene.frame_set(frame_current, subframe=subframe)
+    return samples
+
+def frame_range(frame_start, frame_end, step=1):
+    return np.arange(frame_start, frame_end + step * 0.5, step, dtype=np.float32)
+
+def remove_shape_key_animation(key, indices, frames=None, remove_empty_action=False):
+    fcurves = shape_key_fcurves(key)
+    if fcurves is None:
+        return 0
+    
+    count = 0
+    for i, fc in shape_key_fcurve_lookup(key, fcurves, indices):
+        if frames is None or remove_fcurve_points(fc, *frames):
+            fcurves.remove(fc)
+            profile_writes(1)
+        count += 1
+    
+    if remove_empty_action and not len(fcurves):
+        action = key.animation_data.action
+        key.animation_data.action = None
+        if not action.users:
+            bpy.data.actions.remove(action)
+    return count
+
+def vertex_group_weights(ob, group_indices):
+    # single sweep over all group memberships, returns the sparse 
+    # vertex x group weight matrix as (vertex, group, weight) triplets
+    group_indices = set(group_indices)
+    verts, groups, weights = [], [], []
+    for index, vert in enumerate(ob.data.vertices):
+        for item in vert.groups:
+            if item.group in group_indices:
+                verts.append(index)
+                groups.append(item.group)
+                weights.append(item.weight)
+
+    return (np.array(verts, dtype=np.int64),
+            np.array(groups, dtype=np.int64),
+            np.array(weights, dtype=np.float32))
+
+def merge_vertex_group_weights(verts, weights, group_count, mode):
+    # reduce the weights per vertex, groups a vertex is not 
+    # assigned to count as 0 for 'AVERAGE' and 'MULTIPLY'
+    order = np.argsort(verts, kind='stable')
+    verts, weights = verts[order], weights[order]
+    rows, starts, counts = np.unique(verts, return_index=True, return_counts=True)
+    if not len(rows):
+        return rows, weights
+
+    if mode == 'MAX':
+        result = np.maximum.reduceat(weights, starts)
+    elif mode == 'MULTIPLY':
+        result = np.multiply.reduceat(weights, starts) * (counts == group_count)
+    else:
+        result = np.add.reduceat(weights, starts)
+        if mode == 'AVERAGE':
+            result /= group_count
+        elif mode == 'NORMALIZE' and result.max() > 0:
+            result /= result.max()
+
+    return rows, np.clip(result, 0.0, 1.0).astype(np.float32)
+
+def write_vertex_group_weights(vgroup, verts, weights):
+    # one add() call per distinct weight instead of one per vertex, the
+    # weights are written as they are. Vertices with a weight of 0 are 
+    # taken out of the group
+    weights = np.clip(weights, 0.0, 1.0)
+    zero = weights <= 0
+    if zero.any():
+        vgroup.remove(verts[zero].tolist())
+        profile_writes(np.count_nonzero(zero))
+        verts, weights = verts[~zero], weights[~zero]
+    
+    values, inverse = np.unique(weights, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    splits = np.cumsum(np.bincount(inverse, minlength=len(values)))[:-1]
+    for value, chunk in zip(values.tolist(), np.split(verts[order], splits)):
+        vgroup.add(chunk.tolist(), value, 'REPLACE')
+    profile_writes(len(verts), len(values))
+
+def vertex_group_mask(ob, name, invert=False):
+    # dense per vertex weights of a group, None if there is no such group
+    vgroup = ob.vertex_groups.get(name)
+    if vgroup is None:
+        return None
+    mask = np.zeros(len(ob.data.vertices), dtype=np.float32)
+    verts, groups, weights = vertex_group_weights(ob, [vgroup.index])
+    mask[verts] = weights
+    return 1.0 - mask if invert else mask
+
+def vertex_group_matrix(ob, names):
+    # dense group x vertex weights of the groups found on the object
+    vgroups = [ob.vertex_groups[n] for n in names if n in ob.vertex_groups]
+    matrix = np.zeros((len(vgroups), len(ob.data.vertices)), dtype=np.float32)
+    if vgroups:
+        rows = np.full(len(ob.vertex_groups), -1, dtype=np.int64)
+        rows[[g.index for g in vgroups]] = np.arange(len(vgroups))
+        verts, groups, weights = vertex_group_weights(ob, [g.index for g in vgroups])
+        matrix[rows[groups], verts] = weights
+    return [g.name for g in vgroups], matrix
+
+def mesh_edges(mesh):
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    return edges.reshape(-1, 2)
+
+# -------------------------------------------------------------------
+#   Delta Helper    
+# -------------------------------------------------------------------
+
+def write_key_block_coords(key_block, co):
+    co = np.ascontiguousarray(co, dtype=np.float32).ravel()
+    key_block.data.foreach_set("co", co)
+    profile_writes(len(co))
+
+def shape_key_deltas(key_blocks, indices):
+    # (key index, relative coords, deltas) per key, every relative key
+    # is only read once
+    relative = {}
+    for i in indices.tolist():
+        key_block = key_blocks[i]
+        name = key_block.relative_key.name
+        if name not in relative:
+            relative[name] = key_block_coords(key_block.relative_key)
+        yield i, relative[name], key_block_coords(key_block) - relative[name]
+
+def write_shape_key_deltas(key_blocks, results):
+    # results maps key index -> (original relative coords, new deltas),
+    # all read before the first write. A key whose relative key is
+    # rewritten as well is placed on the new coords of its relative key,
+    # so the result does not depend on the order of the keys
+    lookup = {name: i for i, name in enumerate(key_blocks.keys())}
+    coords = {}
+    for i in results:
+        chain = []
+        while i in results and i not in coords and i not in chain:
+            chain.append(i)
+            i = lookup[key_blocks[i].relative_key.name]
+        for i in reversed(chain):
+            base, deltas = results[i]
+            base = coords.get(lookup[key_blocks[i].relative_key.name], base)
+            coords[i] = base + deltas
+    for i, co in coords.items():
+        write_key_block_coords(key_blocks[i], co)
+
+def apply_delta_mask(deltas, result, mask):
+    # blend between the original and the new deltas by vertex weight
+    if mask is None:
+        return result
+    return deltas + (result - deltas) * mask[:, None]
+
+def laplacian_smooth(values, edges, iterations=1, factor=0.5):
+    # move every vertex towards the average of its edge neighbours,
+    # loose vertices are left alone
+    count = len(values)
+    a, b = edges[:, 0], edges[:, 1]
+    degree = np.bincount(a, minlength=count) + np.bincount(b, minlength=count)
+    connected = degree > 0
+    degree = np.maximum(degree, 1).astype(np.float32)
+    values = values.copy()
+    for _ in range(iterations):
+        average = np.empty_like(values)
+        for axis in range(values.shape[1]):
+            column = values[:, axis]
+            average[:, axis] = (np.bincount(a, column[b], count) + 
+                np.bincount(b, column[a], count)) / degree
+        values[connected] += (average[connected] - values[connected]) * factor
+    return values
+
+def scale_shape_key_deltas(ob, indices, factor, mask=None):
+    key_blocks = ob.data.shape_keys.key_blocks
+    write_shape_key_deltas(key_blocks, {i: (base, apply_delta_mask(deltas, deltas * factor, mask)) 
+        for i, base, deltas in shape_key_deltas(key_blocks, indices)})
+
+def smooth_shape_key_deltas(ob, indices, iterations, factor, mask=None):
+    key_blocks = ob.data.shape_keys.key_blocks
+    edges = mesh_edges(ob.data)
+    results = {}
+    for i, base, deltas in shape_key_deltas(key_blocks, indices):
+        smoothed = laplacian_smooth(deltas, edges, iterations, factor)
+        results[i] = base, apply_delta_mask(deltas, smoothed, mask)
+    write_shape_key_deltas(key_blocks, results)
+
+def mask_shape_key_deltas(ob, indices, mask):
+    key_blocks = ob.data.shape_keys.key_blocks
+    write_shape_key_deltas(key_blocks, {i: (base, deltas * mask[:, None]) 
+        for i, base, deltas in shape_key_deltas(key_blocks, indices)})
+
+def blend_shape_keys(ob, indices, name, use_values=True, mask=None):
+    # sum of the (weighted) deltas as a new key on top of the reference key
+    key_blocks = ob.data.shape_keys.key_blocks
+    values = key_blocks_get(key_blocks, "value")
+    total = np.zeros((len(ob.data.vertices), 3), dtype=np.float32)
+    for i, base, deltas in shape_key_deltas(key_blocks, indices):
+        total += deltas * values[i] if use_values else deltas
+    
+    if mask is not None:
+        total *= mask[:, None]
+    key_block = ob.shape_key_add(name=name, from_mix=False)
+    write_key_block_coords(key_block, key_block_coords(key_block.relative_key) + total)
+    return key_block
+
+def axis_side_weights(co, axis=0, falloff=0.0):
+    # weight of the positive side, blended linearly across the plane 
+    # within the falloff distance
+    position = co[:, axis]
+    if falloff > 0:
+        return np.clip(0.5 + position / (2 * falloff), 0.0, 1.0).astype(np.float32)
+    return ((position > 0) + 0.5 * (position == 0)).astype(np.float32)
+
+def split_shape_keys(ob, indices, masks):
+    # one new key per (suffix, weights) and source key, the new keys
+    # keep the relative key and settings of their source
+    key_blocks = ob.data.shape_keys.key_blocks
+    names = key_blocks.keys()
+    sources = [(names[i], base, deltas) for i, base, deltas in shape_key_deltas(key_blocks, indices)]
+    added = []
+    for name, base, deltas in sources:
+        source = key_blocks[name]
+        # slider_min and slider_max clamp each other, the maximum is
+        # opened up first
+        settings = (("relative_key", source.relative_key), ("vertex_group", source.vertex_group),
+            ("slider_max", 10.0), ("slider_min", source.slider_min), 
+            ("slider_max", source.slider_max), ("value", source.value))
+        for suffix, weights in masks:
+            key_block = ob.shape_key_add(name=name + suffix, from_mix=False)
+            for attr, value in settings:
+                setattr(key_block, attr, value)
+            profile_writes(len(settings) + 1, len(settings) + 1)
+            write_key_block_coords(key_block, base + deltas * weights[:, None])
+            added.append(key_block.name)
+    return added
+
+def shape_key_mix(ob, mask=None):
+    # reference key plus the weighted offsets of all unmuted keys, each
+    # limited by its own vertex group like the evaluated mesh
+    key = ob.data.shape_keys
+    key_blocks = key.key_blocks
+    base = key_block_coords(key.reference_key)
+    if ob.show_only_shape_key:
+        active = np.array([ob.active_shape_key_index], dtype=np.int64)
+        values = np.ones(len(key_blocks), dtype=np.float32)
+    else:
+        values = key_blocks_get(key_blocks, "value")
+        mute = key_blocks_get(key_blocks, "mute", bool)
+        active = np.flatnonzero(~mute & (values != 0))
+    active = active[active != 0]
+    
+    mix = base.copy()
+    groups = {}
+    for i, relative, deltas in shape_key_deltas(key_blocks, active):
+        name = key_blocks[i].vertex_group
+        if name and name not in groups:
+            groups[name] = vertex_group_mask(ob, name)
+        weights = groups.get(name) if name else None
+        if weights is None:
+            mix += deltas * values[i]
+        else:
+            mix += deltas * (weights * values[i])[:, None]
+    
+    if mask is not None:
+        mix = base + (mix - base) * mask[:, None]
+    return mix, active
+
+def replace_reference_key(ob, co, mixed):
+    # every key is moved by the same offset, so all offsets stay the 
+    # same, the mixed keys are set to 0 to keep the shape
+    key = ob.data.shape_keys
+    key_blocks = key.key_blocks
+    offset = co - key_block_coords(key.reference_key)
+    for key_block in key_blocks:
+        if key_block == key.reference_key:
+            write_key_block_coords(key_block, co)
+        else:
+            write_key_block_coords(key_block, key_block_coords(key_block) + offset)
+    ob.data.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+    set_shape_key_values(key, mixed, 0.0)
+    ob.data.update()
+
+def mix_to_mesh(ob, co, name):
+    # copy of the object and its mesh without shape keys
+    mesh = ob.data.copy()
+    mesh.name = name
+    if mesh.shape_keys:
+        # shape keys can only be cleared through an object
+        temp = bpy.data.objects.new(name, mesh)
+        temp.shape_key_clear()
+        bpy.data.objects.remove(temp)
+        profile_writes(1)
+    co = np.ascontiguousarray(co, dtype=np.float32).ravel()
+    mesh.vertices.foreach_set("co", co)
+    profile_writes(len(co))
+    mesh.update()
+    
+    new_ob = ob.copy()
+    new_ob.name = name
+    new_ob.data = mesh
+    for collection in ob.users_collection:
+        collection.objects.link(new_ob)
+    # the two names, the mesh and the collection links
+    profile_writes(3 + len(ob.users_collection), 3 + len(ob.users_collection))
+    return new_ob
+
+def shape_key_delta_stats(ob, indices, tolerance=0.0):
+    # max and mean offset length and the number of vertices moved 
+    # further than the tolerance, one row per key
+    key_blocks = ob.data.shape_keys.key_blocks
+    stats = np.zeros((len(indices), 3), dtype=np.float64)
+    for row, (i, base, deltas) in enumerate(shape_key_deltas(key_blocks, indices)):
+        lengths = np.sqrt(np.einsum("ij,ij->i", deltas, deltas))
+        if len(lengths):
+            stats[row] = lengths.max(), lengths.mean(), np.count_nonzero(lengths > tolerance)
+    return stats
+
+def shape_key_memory(ob, key_count=None):
+    # every key stores a float3 per vertex
+    if key_count is None:
+        key_count = len(ob.data.shape_keys.key_blocks)
+    return key_count * len(ob.data.vertices) * 12
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return "%.1f %s" % (size, unit)
+        size /= 1024
+    return "%.1f GB" % size
+
+# -------------------------------------------------------------------
+#   Driver Helper    
+# -------------------------------------------------------------------
+
+DriverTemplate = namedtuple("DriverTemplate", ("target", "variable", "variable_type", 
+    "data_path", "bone", "transform_type", "transform_space", "expression"))
+
+# functions and names of the python-free evaluator of driver expressions
+simple_expression_functions = frozenset((
+    "abs", "fabs", "floor", "ceil", "trunc", "round", "int", "min", "max",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2", "exp", "log", 
+    "sqrt", "pow", "fmod", "radians", "degrees", "clamp", "lerp", "smoothstep"))
+simple_expression_names = frozenset(("pi", "True", "False", "frame"))
+# python 3.7 (Blender 2.80 - 2.82) parses literals as Num, Str and NameConstant
+literal_expression_nodes = tuple(getattr(ast, n) for n in 
+    ("Constant", "Num", "Str", "NameConstant") if hasattr(ast, n))
+simple_expression_nodes = literal_expression_nodes + (ast.Expression, ast.BinOp, 
+    ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or, 
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+def literal_value(node):
+    for name in ("value", "n", "s"):
+        if hasattr(node, name):
+            return getattr(node, name)
+    return None
+
+def is_simple_expression(expression, variables):
+    # static check, the driver reports the final verdict after it has
+    # been created (Driver.is_simple_expression)
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return False
+    names = simple_expression_names | set(variables)
+    for node in ast.walk(tree):
+        if not isinstance(node, simple_expression_nodes):
+            return False
+        if isinstance(node, literal_expression_nodes) and not isinstance(literal_value(node), (int, float)):
+            return False
+        if isinstance(node, ast.Call):
+            if (node.keywords or not isinstance(node.func, ast.Name) or 
+                    node.func.id not in simple_expression_functions):
+                return False
+        elif isinstance(node, ast.Name) and node.id not in names:
+            if node.id not in simple_expression_functions:
+                return False
+    return True
+
+def fill_template(text, name, index):
+    return text.replace("{name}", name).replace("{index}", str(index))
+
+def shape_key_driver_lookup(key):
+    # data_path: driver fcurve of the key blocks
+    if key.animation_data is None:
+        return {}
+    return {fc.data_path: fc for fc in key.animation_data.drivers 
+        if fc.data_path.startswith("key_blocks[")}
+
+def add_template_drivers(key, indices, template, replace=True):
+    # one driver per key, returns (added, drivers not on the simple
+    # expression path)
+    key_blocks = key.key_blocks
+    existing = shape_key_driver_lookup(key)
+    escape = getattr(bpy.utils, "escape_identifier", lambda name: name.replace('"', '\\"'))
+    added = fallback = 0
+    for i in indices.tolist():
+        key_block = key_blocks[i]
+        fc = existing.get(key_block.path_from_id("value"))
+        if fc is not None and not replace:
+            continue
+        writes = fc is None
+        fc = fc or key_block.driver_add("value")
+        driver = fc.driver
+        driver.type = 'SCRIPTED'
+        writes += 1 + len(driver.variables)
+        while driver.variables:
+            driver.variables.remove(driver.variables[0])
+        
+        variable = driver.variables.new()
+        variable.name = template.variable
+        variable.type = template.variable_type
+        target = variable.targets[0]
+        target.id = template.target
+        if template.variable_type == 'TRANSFORMS':
+            target.bone_target = fill_template(template.bone, key_block.name, i)
+            target.transform_type = template.transform_type
+            target.transform_space = template.transform_space
+            writes += 3
+        else:
+            target.data_path = fill_template(template.data_path, escape(key_block.name), i)
+            writes += 1
+        driver.expression = fill_template(template.expression, key_block.name, i)
+        # the new variable, its name, type and target and the expression
+        writes += 5
+        profile_writes(writes, writes)
+        
+        added += 1
+        fallback += not getattr(driver, "is_simple_expression", True)
+    return added, fallback
+
+def driver_signature(driver):
+    # drivers that compute the same from the same inputs
+    variables = []
+    for variable in driver.variables:
+        targets = tuple((t.id.name if t.id else "", t.data_path, t.bone_target, 
+            t.transform_type, t.transform_space) for t in variable.targets)
+        variables.append((variable.name, variable.type, targets))
+    return (driver.type, driver.expression if driver.type == 'SCRIPTED' else "", tuple(variables))
+
+def audit_shape_key_drivers(key):
+    # (key block name, fcurve, issues) of every value driver
+    key_blocks = key.key_blocks
+    drivers = shape_key_driver_lookup(key)
+    report, signatures = [], {}
+    for key_block in key_blocks:
+        fc = drivers.get(key_block.path_from_id("value"))
+        if fc is None:
+            continue
+        driver = fc.driver
+        issues = []
+        if driver.type == 'SCRIPTED' and not getattr(driver, "is_simple_expression", True):
+            issues.append('PYTHON')
+        if not driver.is_valid or not all(v.is_valid for v in driver.variables):
+            issues.append('INVALID')
+        # frame or constant expressions, reported but never removed
+        if not len(driver.variables):
+            issues.append('NO_VARIABLES')
+        if key_block.mute or fc.mute:
+            issues.append('MUTED')
+        signature = driver_signature(driver)
+        if signature in signatures:
+            issues.append('DUPLICATE')
+        signatures.setdefault(signature, key_block.name)
+        report.append((key_block.name, fc, issues))
+    return report
+
+def measure_driver_cost(context, fcurves, frames):
+    # time per frame with and without the drivers, the difference is
+    # what the drivers cost
+    scene = context.scene
+    frame_current, subframe = scene.frame_current, scene.frame_subframe
+    mute = [fc.mute for fc in fcurves]
+    timings = []
+    # the first pass is not timed, it pays for the cold start
+    for muted in (False, False, True):
+        for fc in fcurves:
+            fc.mute = muted
+        start = time.perf_counter()
+        for frame in frames.tolist():
+            scene.frame_set(int(frame))
+        timings.append(time.perf_counter() - start)
+    timings = timings[1:]
+    
+    for fc, state in zip(fcurves, mute):
+        fc.mute = state
+    scene.frame_set(frame_current, subframe=subframe)
+    return max(0.0, timings[0] - timings[1]) / max(1, len(frames))
+
+class SimpleExpressionTransformer(ast.NodeTransformer):
+    # math.sin(x) -> sin(x), x ** y -> pow(x, y)
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        if (isinstance(node.value, ast.Name) and node.value.id == "math" and 
+                node.attr in simple_expression_functions | {"pi"}):
+            return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(ast.Call(func=ast.Name(id="pow", ctx=ast.Load()),
+                args=[node.left, node.right], keywords=[]), node)
+        return node
+
+expression_symbols = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/",
+    ast.USub: "-", ast.UAdd: "+", ast.Not: "not ", ast.And: " and ", ast.Or: " or ",
+    ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+
+def unparse_expression(node):
+    # fully parenthesized source of a simple expression, ast.unparse
+    # is only available since python 3.9 (Blender 2.93)
+    if isinstance(node, ast.Expression):
+        return unparse_expression(node.body)
+    if isinstance(node, ast.BinOp):
+        return "(%s %s %s)" % (unparse_expression(node.left), 
+            expression_symbols[type(node.op)], unparse_expression(node.right))
+    if isinstance(node, ast.UnaryOp):
+        return "(%s%s)" % (expression_symbols[type(node.op)], unparse_expression(node.operand))
+    if isinstance(node, ast.BoolOp):
+        return "(%s)" % expression_symbols[type(node.op)].join(unparse_expression(v) for v in node.values)
+    if isinstance(node, ast.Compare):
+        return "(%s %s)" % (unparse_expression(node.left), " ".join("%s %s" % (
+            expression_symbols[type(op)], unparse_expression(c)) for op, c in zip(node.ops, node.comparators)))
+    if isinstance(node, ast.IfExp):
+        return "(%s if %s else %s)" % (unparse_expression(node.body), 
+            unparse_expression(node.test), unparse_expression(node.orelse))
+    if isinstance(node, ast.Call) and not node.keywords:
+        return "%s(%s)" % (unparse_expression(node.func), ", ".join(unparse_expression(a) for a in node.args))
+    if isinstance(node, ast.Attribute):
+        return "%s.%s" % (unparse_expression(node.value), node.attr)
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, literal_expression_nodes):
+        return repr(literal_value(node))
+    raise KeyError(type(node).__name__)
+
+def simplify_expression(expression, variables):
+    # returns the rewritten expression or None if it still needs python
+    unparse = getattr(ast, "unparse", unparse_expression)
+    try:
+        tree = SimpleExpressionTransformer().visit(ast.parse(expression, mode='eval'))
+        result = unparse(ast.fix_missing_locations(tree))
+    except (SyntaxError, KeyError):
+        return None
+    return result if is_simple_expression(result, variables) else None
+
+# -------------------------------------------------------------------
+#   File Helper    
+# -------------------------------------------------------------------
+
+# magic, offset and length of the json header at the end of the file,
+# followed by the arrays as complete .npy blobs that can be memory mapped
+ske_file_magic = b"SKEXTRA1"
+ske_file_preamble = struct.Struct("<8sQQ")
+ske_file_alignment = 64
+
+def write_file_blob(f, array):
+    f.write(b"\0" * (-f.tell() % ske_file_alignment))
+    offset = f.tell()
+    np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+    return offset
+
+def write_file_header(f, header):
+    offset = f.tell()
+    data = json.dumps(header).encode("utf-8")
+    f.write(data)
+    f.seek(0)
+    f.write(ske_file_preamble.pack(ske_file_magic, offset, len(data)))
+
+def read_file_header(filepath):
+    with open(filepath, "rb") as f:
+        magic, offset, length = ske_file_preamble.unpack(f.read(ske_file_preamble.size))
+        if magic != ske_file_magic:
+            raise ValueError("%s is not a Shape Key Extras file" % filepath)
+        f.seek(offset)
+        return json.loads(f.read(length).decode("utf-8"))
+
+def read_file_blob(filepath, offset):
+    # read only the .npy header, the data stays on disk
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+    if not int(np.prod(shape)):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(filepath, dtype=dtype, mode='r', offset=data_offset, 
+        shape=shape, order='F' if fortran_order else 'C')
+
+def export_shape_key_deltas(filepath, ob, indices, dtype=np.float32, sparse=True, tolerance=0.0):
+    # one key at a time, only the offsets of moved vertices if sparse
+    key_blocks = ob.data.shape_keys.key_blocks
+    entries = []
+    with open(filepath, "wb") as f:
+        f.write(ske_file_preamble.pack(ske_file_magic, 0, 0))
+        for i, base, deltas in shape_key_deltas(key_blocks, indices):
+            key_block = key_blocks[i]
+            entry = {
+                "name": key_block.name,
+                "relative_key": key_block.relative_key.name,
+                "value": key_block.value,
+                "slider_min": key_block.slider_min,
+                "slider_max": key_block.slider_max,
+                "mute": key_block.mute,
+                "vertex_group": key_block.vertex_group,
+                "interpolation": key_block.interpolation,
+                "vertices": None,
+                }
+            if sparse:
+                moved = np.flatnonzero(np.abs(deltas).max(axis=1) > tolerance) if len(deltas) else []
+                # a moved vertex costs a uint32 index plus its offset,
+                # every vertex of a dense key costs just the offset
+                itemsize = np.dtype(dtype).itemsize
+                if len(moved) * (4 + 3 * itemsize) < len(deltas) * 3 * itemsize:
+                    entry["vertices"] = write_file_blob(f, moved.astype(np.uint32))
+                    deltas = deltas[moved]
+            entry["deltas"] = write_file_blob(f, deltas.astype(dtype))
+            entries.append(entry)
+        
+        write_file_header(f, {
+            "content": "deltas",
+            "version": 1,
+            "object": ob.name,
+            "vertex_count": len(ob.data.vertices),
+            "keys": entries,
+            })
+    return len(entries)
+
+def import_shape_key_deltas(filepath, ob, replace=True):
+    # stream the keys from the file into foreach_set, only one key
+    # and its relative key are in memory at any time. Returns the names
+    # of the imported keys and of the relative keys that were not found
+    header = read_file_header(filepath)
+    if header.get("content") != "deltas":
+        raise ValueError("%s does not contain Shape Key offsets" % filepath)
+    count = len(ob.data.vertices)
+    if header["vertex_count"] != count:
+        raise ValueError("Vertex count of %s does not match (%s, %s)" % (
+            filepath, header["vertex_count"], count))
+    
+    if not ob.data.shape_keys:
+        ob.shape_key_add(name="Basis", from_mix=False)
+        profile_writes(1)
+    key = ob.data.shape_keys
+    key_blocks = key.key_blocks
+    
+    # create all keys first, so relative keys later in the file are found
+    created = {}
+    for entry in header["keys"]:
+        key_block = key_blocks.get(entry["name"]) if replace else None
+        if key_block is None or key_block == key.reference_key:
+            key_block = ob.shape_key_add(name=entry["name"], from_mix=False)
+            profile_writes(1)
+        created[entry["name"]] = key_block.name
+    
+    unresolved = []
+    for entry in header["keys"]:
+        key_block = key_blocks[created[entry["name"]]]
+        relative = key_blocks.get(created.get(entry["relative_key"], entry["relative_key"]))
+        if relative is None:
+            unresolved.append(entry["relative_key"])
+            relative = key.reference_key
+        key_block.relative_key = relative
+    profile_writes(len(header["keys"]), len(header["keys"]))
+    
+    # a relative key from the file is written before the keys based on it
+    entries = {entry["name"]: entry for entry in header["keys"]}
+    order, done = [], set()
+    for name in entries:
+        chain = []
+        while name in entries and name not in done and name not in chain:
+            chain.append(name)
+            name = entries[name]["relative_key"]
+        order.extend(reversed(chain))
+        done.update(chain)
+    
+    relative_name, relative_co = None, None
+    imported = []
+    for entry in (entries[name] for name in order):
+        key_block = key_blocks[created[entry["name"]]]
+        if key_block.relative_key.name != relative_name:
+            relative_name = key_block.relative_key.name
+            relative_co = key_block_coords(key_block.relative_key)
+        deltas = read_file_blob(filepath, entry["deltas"])
+        if entry["vertices"] is None:
+            co = relative_co + deltas
+        else:
+            co = relative_co.copy()
+            co[read_file_blob(filepath, entry["vertices"])] += deltas
+        write_key_block_coords(key_block, co)
+        if key_block.name == relative_name:
+            relative_co = co
+        
+        # slider_min and slider_max clamp each other, the maximum is
+        # opened up first
+        settings = (("slider_max", 10.0), ("slider_min", entry["slider_min"]), 
+            ("slider_max", entry["slider_max"]), ("value", entry["value"]), ("mute", entry["mute"]),
+            ("vertex_group", entry["vertex_group"]), ("interpolation", entry["interpolation"]))
+        for attr, value in settings:
+            setattr(key_block, attr, value)
+        profile_writes(len(settings), len(settings))
+        imported.append(key_block.name)
+    
+    return imported, unresolved
+
+def export_shape_key_values(filepath, context, targets, frames):
+    # one frames x keys matrix per object, sampled in a single pass
+    samples = sample_shape_key_values(context, [(key, indices) for ob, key, indices in targets], frames)
+    objects = []
+    with open(filepath, "wb") as f:
+        f.write(ske_file_preamble.pack(ske_file_magic, 0, 0))
+        frames_offset = write_file_blob(f, frames.astype(np.float32))
+        for (ob, key, indices), values in zip(targets, samples):
+            objects.append({
+                "object": ob.name,
+                "keys": shape_key_names(key, indices),
+                "values": write_file_blob(f, values),
+                })
+        
+        write_file_header(f, {
+            "content": "values",
+            "version": 1,
+            "fps": context.scene.render.fps / context.scene.render.fps_base,
+            "frames": frames_offset,
+            "objects": objects,
+            })
+    return sum(len(o["keys"]) for o in objects)
+
+def import_shape_key_values(filepath, objects, interpolation='LINEAR', tolerance=None, frame_offset=0):
+    # objects are matched by name, then by their Shape Key names. A file
+    # of a single object is only applied to an other object if that is
+    # the only target. Returns the number of keys and of the names that
+    # were not found
+    header = read_file_header(filepath)
+    if header.get("content") != "values":
+        raise ValueError("%s does not contain Shape Key values" % filepath)
+    frames = np.array(read_file_blob(filepath, header["frames"])) + frame_offset
+    sections = {section["object"]: section for section in header["objects"]}
+    
+    matched = {ob.name: sections.get(ob.name) for ob in objects}
+    unclaimed = [section for name, section in sections.items() if name not in matched]
+    for ob in objects:
+        key = ob.data.shape_keys
+        if matched[ob.name] is not None or key is None:
+            continue
+        names = set(key.key_blocks.keys())
+        candidates = [section for section in unclaimed if names.intersection(section["keys"])]
+        if len(candidates) == 1:
+            matched[ob.name] = candidates[0]
+    # a section found by key names for several objects is ambiguous
+    claims = Counter(id(section) for name, section in matched.items() 
+        if section is not None and name not in sections)
+    for name, section in matched.items():
+        if section is not None and name not in sections and claims[id(section)] > 1:
+            matched[name] = None
+    if len(objects) == 1 and len(sections) == 1 and matched[objects[0].name] is None:
+        matched[objects[0].name] = header["objects"][0]
+    
+    imported = missing = 0
+    for ob in objects:
+        section = matched[ob.name]
+        key = ob.data.shape_keys
+        if section is None or key is None or not len(frames):
+            continue
+        
+        names = key.key_blocks.keys()
+        lookup = {name: i for i, name in enumerate(names)}
+        columns = [c for c, name in enumerate(section["keys"]) if name in lookup]
+        indices = np.array([lookup[section["keys"][c]] for c in columns], dtype=np.int64)
+        values = read_file_blob(filepath, section["values"])
+        bake_shape_key_values(key, indices, frames, values[:, columns], interpolation, tolerance)
+        imported += len(columns)
+        missing += len(section["keys"]) - len(columns)
+    return imported, missing
 
 # -------------------------------------------------------------------
 #   Properties    
@@ -121,6 +1594,21 @@ class SKE_PG_sceneSettings(PropertyGroup):
         default = 1,
         )
     
+    sk_random_seed: IntProperty(
+        name = "Seed",
+        description = "Seed of the random values, the same seed gives the same result, 0 gives new values on every run",
+        default = 0, min = 0
+        )
+    
+    sk_random_distribution: EnumProperty(
+        name="Distribution",
+        description="Distribution of the random values",
+        items = (('UNIFORM', "Uniform", "Every value between Min and Max is equally likely"),
+                ('NORMAL', "Normal", "Values around the center of Min and Max are more likely"),
+                ('WEIGHTED', "Weighted", "Scale the range (or the chance to be enabled) by the size of the offsets of each key"),
+                ),default='UNIFORM'
+        )
+    
     sk_exclude: StringProperty (
         name = "Exclude",
         description = "Exclude by first character",
@@ -142,16 +1630,145 @@ class SKE_PG_sceneSettings(PropertyGroup):
                 ),default='ALL'
         )
 
+    sk_source: EnumProperty(
+        name="Source",
+        description="Where the Selection comes from",
+        items = (('FILTER', "Filter", "Select by Exclude and Only"),
+                ('SET', "Set", "Use a stored Selection Set"),
+                ),default='FILTER'
+        )
+
+    sk_set_name: StringProperty(
+        name="Set",
+        description="Selection Set to use, looked up by name on each Shape Key datablock",
+        default=""
+        )
+
+    sk_set_operation: EnumProperty(
+        name="Operation",
+        items = (('UNION', "Union", "Keys in either Set"),
+                ('INTERSECT', "Intersect", "Keys in both Sets"),
+                ('DIFFERENCE', "Difference", "Keys in the active Set but not in the other one"),
+                ),default='UNION'
+        )
+
+    sk_scope: EnumProperty(
+        name="Scope",
+        description="Objects to operate on",
+        items = (('ACTIVE', "Active", "Active Object only"),
+                ('SELECTED', "Selected", "All selected Objects"),
+                ('COLLECTION', "Collection", "All Objects in the active Collection"),
+                ('SCENE', "Scene", "All Objects in the Scene"),
+                ),default='ACTIVE'
+        )
+
+    sk_profile: BoolProperty(
+        name="Record Timings",
+        description="Record time, keys, rna writes and operator calls of each operation",
+        default=False
+        )
+
+    sk_empty_threshold: FloatProperty(
+        name="Threshold",
+        description="Shape Keys that move no vertex further than this count as empty",
+        default=0.0001, min=0.0, precision=5, step=0.01, unit='LENGTH'
+        )
+
+    sk_delta_vgroup: StringProperty(
+        name="Mask",
+        description="Vertex Group that limits the Delta operations, looked up by name on each Object",
+        default=""
+        )
+
+    sk_delta_invert: BoolProperty(
+        name="Invert",
+        description="Invert the Vertex Group mask",
+        default=False
+        )
+
     sk_set_attributes: BoolProperty(default=False)
+    sk_show_profile: BoolProperty(default=False)
+    sk_show_sets: BoolProperty(default=False)
+    sk_show_recipe: BoolProperty(default=False)
+    sk_recipe_index: IntProperty()
     sk_advanced_selection: BoolProperty(default=False)
+    sk_list_filter: BoolProperty(
+        name="Filter List",
+        description="Only show the Shape Keys in Selection in the Shape Key list",
+        default=False
+        )
     vg_uilist_index: IntProperty()
     vg_merge_vgroups: BoolProperty(default=False)
+    vg_shape_key_weights: BoolProperty(default=False)
+
+    vg_merge_mode: EnumProperty(
+        name="Mode",
+        description="How to combine the weights of the groups",
+        items = (('SUM', "Sum", "Add the weights, clamped to 1"),
+                ('MAX', "Maximum", "Use the highest weight"),
+                ('AVERAGE', "Average", "Average of the weights"),
+                ('MULTIPLY', "Multiply", "Multiply the weights"),
+                ('NORMALIZE', "Normalize", "Add the weights and scale the result to a maximum of 1"),
+                ),default='SUM'
+        )
 
 
 class SKE_PT_indexShapeKeys(PropertyGroup):
     collection_id: IntProperty()
 
 
+class SKE_PG_recipeStep(PropertyGroup):
+    # the selection properties share their names with the scene settings,
+    # so compile_selection() works on both
+    operation: EnumProperty(
+        name="Operation",
+        items = (('ENABLE', "Enable", "Enable all Shape Keys in Selection"),
+                ('DISABLE', "Disable", "Disable all Shape Keys in Selection"),
+                ('TOGGLE', "Toggle", "Toggle the Visibility of all Shape Keys in Selection"),
+                ('SET_VALUE', "Set Value", "Assign Value to all Shape Keys in Selection"),
+                ('SET_RANGE', "Set Range", "Set the Range to Value and Max"),
+                ('RANDOMIZE', "Randomize", "Random Values with the Random settings of the Scene"),
+                ('INSERT_KEYFRAME', "Insert Keyframe", "Keyframe the Values on the current frame"),
+                ('REMOVE_KEYFRAMES', "Remove Keyframes", "Remove all Keyframes"),
+                ('REMOVE_DRIVERS', "Remove Drivers", "Remove all Drivers"),
+                ('SCALE_DELTAS', "Scale Deltas", "Scale the offsets by Value"),
+                ('REMOVE_EMPTY', "Remove Empty", "Remove keys that move no vertex further than Value"),
+                ('REMOVE', "Remove", "Remove all Shape Keys in Selection"),
+                ),default='SET_VALUE'
+        )
+    value: FloatProperty(name="Value", default=0.0)
+    value_max: FloatProperty(name="Max", default=1.0)
+    use_scene_selection: BoolProperty(
+        name="Scene Selection",
+        description="Use the Selection of the Scene instead of the one stored with the step",
+        default=False
+        )
+    sk_exclude: StringProperty(name="Exclude", default="Basis, #, *")
+    sk_only: StringProperty(name="Only", default="")
+    sk_selection: EnumProperty(
+        name="Selection",
+        items = (('ALL', "All", ""),
+                ('ENABLED', "Enabled", ""),
+                ('DISABLED', "Disabled", ""),
+                ),default='ALL'
+        )
+    sk_source: EnumProperty(
+        name="Source",
+        items = (('FILTER', "Filter", "Select by Exclude and Only"),
+                ('SET', "Set", "Use a stored Selection Set"),
+                ),default='FILTER'
+        )
+    sk_set_name: StringProperty(name="Set", default="")
+
+
+class SKE_PG_selectionSet(PropertyGroup):
+    # bitset over the key blocks, see selection_set_mask()
+    bits: StringProperty()
+    size: IntProperty()
+    layout: StringProperty()
+    members: StringProperty()
+
+
 # -------------------------------------------------------------------
 #   Shape Key Operators    
 # -------------------------------------------------------------------
@@ -162,15 +1779,16 @@ class SKE_OT_enableShapeKeys(Operator):
     bl_description = "Enable all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = (shape_key_selection(self, context))
-            for i in shape_keys:
-                shapekey = context.object.data.shape_keys.key_blocks[i]
-                shapekey.mute = False
+        targets = shape_key_selections(self, context)
+        if targets:
+            for ob, key, indices in targets:
+                set_shape_key_mute(key, indices, 'ENABLE')
+                tag_shape_key_update(key)
 
             self.report({'INFO'}, "All Shape Keys enabled")
         else: 
@@ -185,15 +1803,16 @@ class SKE_OT_disableShapeKeys(Operator):
     bl_description = "Mute all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
     
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                shapekey = context.object.data.shape_keys.key_blocks[i]
-                shapekey.mute = True
+        targets = shape_key_selections(self, context)
+        if targets:
+            for ob, key, indices in targets:
+                set_shape_key_mute(key, indices, 'DISABLE')
+                tag_shape_key_update(key)
 
             self.report({'INFO'}, "All Shape Keys disabled")        
         else: 
@@ -208,15 +1827,16 @@ class SKE_OT_toggleShapeKeys(Operator):
     bl_description = "Toggle Mute State of all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
     
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                shapekey = context.object.data.shape_keys.key_blocks[i]
-                shapekey.mute = not shapekey.mute
+        targets = shape_key_selections(self, context)
+        if targets:
+            for ob, key, indices in targets:
+                set_shape_key_mute(key, indices, 'TOGGLE')
+                tag_shape_key_update(key)
 
             self.report({'INFO'}, "Enabled Shape Keys disabled and Disabled Shape Keys enabled")
         else: 
@@ -230,15 +1850,18 @@ class SKE_OT_randomShapeKeyEnable(Operator):
     bl_description = "Randomize Visibility/Mute State for all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                shapekey = context.object.data.shape_keys.key_blocks[i]
-                shapekey.mute = bool(random.getrandbits(1))
+        targets = shape_key_selections(self, context)
+        if targets:
+            rng = random_generator(ske)
+            for ob, key, indices in targets:
+                set_shape_key_mute(key, indices, 'SET', 
+                    random_shape_key_mute(key, indices, ske, rng))
+                tag_shape_key_update(key)
 
             self.report({'INFO'}, "Ramdomized Shape Key Visibility")
         else:
@@ -252,16 +1875,18 @@ class SKE_OT_randomShapeKeyValue(Operator):
     bl_description = "Randomize Shape Key Value for all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    shapekey = context.object.data.shape_keys.key_blocks[i]
-                    shapekey.value = random.uniform(ske.sk_random_min, ske.sk_random_max)
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            rng = random_generator(ske)
+            for ob, key, indices in targets:
+                values = random_shape_key_values(key, indices, ske, rng)
+                set_shape_key_values(key, indices, values[0])
+                tag_shape_key_update(key)
 
             self.report({'INFO'}, "Values for Shape Keys generated")
         else:
@@ -269,23 +1894,70 @@ class SKE_OT_randomShapeKeyValue(Operator):
         return {'FINISHED'}
 
 
-class SKE_OT_setShapeKeyRange(Operator):
-    bl_idname = "shapekeyextras.set_range"
-    bl_label = "Set Shape Key Range"
-    bl_description = "Set Range Values for Shape Keys in Selection"
+class SKE_OT_bakeRandomShapeKeyValues(Operator):
+    bl_idname = "shapekeyextras.bake_random"
+    bl_label = "Bake Random Animation"
+    bl_description = "Bake random or smoothed noise Values for all Shape Keys in Selection over a Frame Range"
     bl_options = {'REGISTER', 'UNDO'}
-
-    def execute(self, context):
-        scn = context.scene
-        ske = scn.shape_key_extras
-        
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    shapekey = context.object.data.shape_keys.key_blocks[i]
-                    shapekey.slider_min = ske.sk_random_min
-                    shapekey.slider_max = ske.sk_random_max
+    
+    frame_start: IntProperty(name="Start")
+    frame_end: IntProperty(name="End")
+    step: FloatProperty(name="Step", default=1, min=0.01)
+    smoothing: IntProperty(
+        name="Smoothing",
+        description="Number of samples to average, 0 for plain random values",
+        default=0, min=0
+        )
+    interpolation: EnumProperty(
+        name="Interpolation",
+        items=(
+        ('CONSTANT', "Constant", ""),
+        ('LINEAR', "Linear", ""),
+        ('BEZIER', "Bezier", "")
+        ),default='BEZIER')
+    
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        scn = context.scene
+        ske = scn.shape_key_extras
+        
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            frames = frame_range(self.frame_start, self.frame_end, self.step)
+            rng = random_generator(ske)
+            for ob, key, indices in targets:
+                if len(frames) and len(indices):
+                    values = random_shape_key_values(key, indices, ske, rng, len(frames))
+                    values = smooth_values(values, self.smoothing)
+                    bake_shape_key_values(key, indices, frames, values, self.interpolation)
+
+            self.report({'INFO'}, "Random Animation baked")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_setShapeKeyRange(Operator):
+    bl_idname = "shapekeyextras.set_range"
+    bl_label = "Set Shape Key Range"
+    bl_description = "Set Range Values for Shape Keys in Selection"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled
+    def execute(self, context):
+        scn = context.scene
+        ske = scn.shape_key_extras
+        
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                set_shape_key_range(key, indices, ske.sk_random_min, ske.sk_random_max)
+                tag_shape_key_update(key)
                     
             self.report({'INFO'}, "Range Values adjusted")
         else:
@@ -299,16 +1971,16 @@ class SKE_OT_applyShapeKeyValue(Operator):
     bl_description = "Assign static Values to all Shape Keys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    shapekey = context.object.data.shape_keys.key_blocks[i]
-                    shapekey.value = ske.sk_value
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                set_shape_key_values(key, indices, ske.sk_value)
+                tag_shape_key_update(key)
                     
             self.report({'INFO'}, "Value assigned to Shape Keys")        
         else:
@@ -322,12 +1994,15 @@ class SKE_OT_removeShapeKeyDriver(Operator):
     bl_description = "Remove Drivers from Shapekeys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    context.object.data.shape_keys.key_blocks[i].driver_remove("value")
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                key_blocks = key.key_blocks
+                for i in indices.tolist():
+                    key_blocks[i].driver_remove("value")
+                profile_writes(len(indices), len(indices))
             
             self.report({'INFO'}, "Drivers Removed")
         else:
@@ -338,18 +2013,115 @@ class SKE_OT_removeShapeKeyDriver(Operator):
         return context.window_manager.invoke_confirm(self, event)
 
 
+class SKE_OT_auditShapeKeyDrivers(Operator):
+    bl_idname = "shapekeyextras.audit_drivers"
+    bl_label = "Audit Drivers"
+    bl_description = ("Print all Shape Key Drivers that need Python, are invalid, drive muted keys "
+        "or duplicate another Driver to the Console")
+    bl_options = {'REGISTER'}
+
+    measure: BoolProperty(
+        name="Measure",
+        description="Step through the Frame Range to measure the time the Drivers take per frame",
+        default=False
+        )
+    frame_start: IntProperty(name="Start")
+    frame_end: IntProperty(name="End")
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = min(context.scene.frame_end, context.scene.frame_start + 99)
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        targets = shape_key_targets(context)
+        counts = {'PYTHON': 0, 'INVALID': 0, 'MUTED': 0, 'DUPLICATE': 0, 'NO_VARIABLES': 0}
+        total = 0
+        fcurves = []
+        for ob, key in targets:
+            report = audit_shape_key_drivers(key)
+            if not report:
+                continue
+            print("Shape Key Drivers (%s): %s" % (ob.name, len(report)))
+            for name, fc, issues in report:
+                for issue in issues:
+                    counts[issue] += 1
+                if issues:
+                    expression = fc.driver.expression if fc.driver.type == 'SCRIPTED' else fc.driver.type
+                    print("  %-32s %-40s %s" % (name, expression, ", ".join(issues)))
+            total += len(report)
+            fcurves.extend(fc for name, fc, issues in report)
+        
+        if not total:
+            self.report({'INFO'}, "No Shape Key Drivers found.")
+            return {'FINISHED'}
+        
+        info = "%s Drivers: %s" % (total, ", ".join("%s %s" % (v, k.replace("_", " ").lower()) 
+            for k, v in counts.items()))
+        if self.measure:
+            frames = frame_range(self.frame_start, self.frame_end)
+            cost = measure_driver_cost(context, fcurves, frames)
+            print("Driver evaluation: %.3f ms per frame" % (cost * 1000))
+            info += ", %.3f ms per frame" % (cost * 1000)
+        problems = any(v for k, v in counts.items() if k != 'NO_VARIABLES')
+        self.report({'WARNING'} if problems else {'INFO'}, info)
+        return {'FINISHED'}
+
+
+class SKE_OT_fixShapeKeyDrivers(Operator):
+    bl_idname = "shapekeyextras.fix_drivers"
+    bl_label = "Fix Drivers"
+    bl_description = "Remove dead Shape Key Drivers and rewrite Python expressions in simple form"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    remove_invalid: BoolProperty(name="Remove Invalid", default=True)
+    remove_muted: BoolProperty(name="Remove on muted Keys", default=False)
+    simplify: BoolProperty(
+        name="Simplify Expressions", 
+        description="Rewrite math.* calls and ** so the expression is evaluated without Python",
+        default=True
+        )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        removed = simplified = 0
+        for ob, key in shape_key_targets(context):
+            for name, fc, issues in audit_shape_key_drivers(key):
+                if ((self.remove_invalid and 'INVALID' in issues) or 
+                        (self.remove_muted and 'MUTED' in issues)):
+                    key.animation_data.drivers.remove(fc)
+                    removed += 1
+                elif self.simplify and 'PYTHON' in issues:
+                    driver = fc.driver
+                    expression = simplify_expression(driver.expression, [v.name for v in driver.variables])
+                    if expression is not None:
+                        driver.expression = expression
+                        simplified += 1
+        
+        profile_writes(removed + simplified, removed + simplified)
+        self.report({'INFO'}, "%s Drivers removed, %s simplified" % (removed, simplified))
+        return {'FINISHED'}
+
+
 class SKE_OT_addShapeKeyDriver(Operator):
     bl_idname = "shapekeyextras.add_drivers"
     bl_label = "Add Drivers"
     bl_description = "Add Drivers to Shapekeys in Selection"
     bl_options = {'REGISTER', 'UNDO'}
     
+    @profiled
     def execute(self, context):
-        if context.object.data.shape_keys:      
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    context.object.data.shape_keys.key_blocks[i].driver_add("value")
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                key_blocks = key.key_blocks
+                for i in indices.tolist():
+                    key_blocks[i].driver_add("value")
+                profile_writes(len(indices), len(indices))
             
             self.report({'INFO'}, "Drivers added")
         else:
@@ -357,161 +2129,1076 @@ class SKE_OT_addShapeKeyDriver(Operator):
         return {'FINISHED'}
 
 
-# http://stackoverflow.com/questions/7977550/how-to-change-the-value-of-the-shape-key-in-blender-script
-class SKE_OT_addShapeKeyKeyframe(Operator):
-    bl_idname = "shapekeyextras.insert_keyframe"
-    bl_label = "Insert Value Keyframe"
-    bl_description = "Insert Keyframe (Shape Key Value) for all Shape Keys in Selection"
+class SKE_OT_addShapeKeyDriverTemplate(Operator):
+    bl_idname = "shapekeyextras.add_template_drivers"
+    bl_label = "Add Drivers from Template"
+    bl_description = ("Add a Driver to every Shape Key in Selection, {name} and {index} "
+        "in the paths and the expression are replaced per key")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    target: StringProperty(name="Target", description="Object the variable reads from")
+    variable: StringProperty(name="Variable", default="var")
+    variable_type: EnumProperty(
+        name="Type",
+        items=(
+        ('SINGLE_PROP', "Property", "Any property of the target, e.g. a custom property"),
+        ('TRANSFORMS', "Transform Channel", "Transform channel of the target or one of its bones"),
+        ))
+    data_path: StringProperty(name="Path", default='["{name}"]')
+    bone: StringProperty(name="Bone", default="")
+    transform_type: EnumProperty(
+        name="Channel",
+        items=[(c, c.replace("_", " ").title(), "") for c in (
+            "LOC_X", "LOC_Y", "LOC_Z", "ROT_X", "ROT_Y", "ROT_Z", "SCALE_X", "SCALE_Y", "SCALE_Z")]
+        )
+    transform_space: EnumProperty(
+        name="Space",
+        items=(
+        ('WORLD_SPACE', "World Space", ""),
+        ('TRANSFORM_SPACE', "Transform Space", ""),
+        ('LOCAL_SPACE', "Local Space", ""),
+        ),default='LOCAL_SPACE')
+    expression: StringProperty(name="Expression", default="var")
+    replace: BoolProperty(
+        name="Replace", 
+        description="Replace existing Drivers, otherwise keys with a Driver are skipped",
+        default=True
+        )
+    allow_python: BoolProperty(
+        name="Allow Python",
+        description="Also create Drivers whose expression needs the Python interpreter",
+        default=False
+        )
+
+    def invoke(self, context, event):
+        if not self.target and context.object:
+            self.target = context.object.name
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop_search(self, "target", bpy.data, "objects")
+        layout.prop(self, "variable_type", expand=True)
+        if self.variable_type == 'TRANSFORMS':
+            layout.prop(self, "bone")
+            row = layout.row(align=True)
+            row.prop(self, "transform_type", text="")
+            row.prop(self, "transform_space", text="")
+        else:
+            layout.prop(self, "data_path")
+        row = layout.row(align=True)
+        row.prop(self, "variable", text="")
+        row.prop(self, "expression", text="")
+        row = layout.row()
+        row.prop(self, "replace")
+        row.prop(self, "allow_python")
+
+    @profiled
+    def execute(self, context):
+        target = bpy.data.objects.get(self.target)
+        if target is None:
+            self.report({'WARNING'}, "Target Object not found.")
+            return {'CANCELLED'}
+        if not self.variable.isidentifier():
+            self.report({'WARNING'}, "%s is not a valid variable name." % self.variable)
+            return {'CANCELLED'}
+
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if not targets:
+            self.report({'WARNING'}, "No shape keys found.")
+            return {'FINISHED'}
+
+        if not self.allow_python:
+            for ob, key, indices in targets:
+                for i, name in zip(indices.tolist(), shape_key_names(key, indices)):
+                    expression = fill_template(self.expression, name, i)
+                    if not is_simple_expression(expression, (self.variable,)):
+                        self.report({'WARNING'}, "'%s' needs Python, only +, -, *, /, comparisons "
+                            "and math functions are evaluated without it." % expression)
+                        return {'CANCELLED'}
+
+        template = DriverTemplate(target, self.variable, self.variable_type, self.data_path, 
+            self.bone, self.transform_type, self.transform_space, self.expression)
+        added = fallback = 0
+        for ob, key, indices in targets:
+            result = add_template_drivers(key, indices, template, self.replace)
+            added, fallback = added + result[0], fallback + result[1]
+        
+        if fallback:
+            self.report({'WARNING'}, "%s Drivers added, %s need Python" % (added, fallback))
+        else:
+            self.report({'INFO'}, "%s Drivers added" % added)
+        return {'FINISHED'}
+
+
+# http://stackoverflow.com/questions/7977550/how-to-change-the-value-of-the-shape-key-in-blender-script
+class SKE_OT_addShapeKeyKeyframe(Operator):
+    bl_idname = "shapekeyextras.insert_keyframe"
+    bl_label = "Insert Value Keyframe"
+    bl_description = "Insert Keyframe (Shape Key Value) for all Shape Keys in Selection"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @profiled
+    def execute(self, context):
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                key_blocks = key.key_blocks
+                for i in indices.tolist():
+                    key_blocks[i].keyframe_insert(data_path="value")
+                profile_writes(len(indices), len(indices))
+            
+            self.report({'INFO'}, "Keyframes inserted")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")    
+        return {'FINISHED'}
+
+
+class SKE_OT_bakeShapeKeyKeyframes(Operator):
+    bl_idname = "shapekeyextras.bake_keyframes"
+    bl_label = "Bake Keyframes"
+    bl_description = "Bake the evaluated Values of all Shape Keys in Selection to Keyframes over a Frame Range"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    frame_start: IntProperty(name="Start")
+    frame_end: IntProperty(name="End")
+    step: FloatProperty(name="Step", default=1, min=0.01)
+    interpolation: EnumProperty(
+        name="Interpolation",
+        items=(
+        ('CONSTANT', "Constant", ""),
+        ('LINEAR', "Linear", ""),
+        ('BEZIER', "Bezier", "")
+        ),default='BEZIER')
+    
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+    
+    @profiled
+    def execute(self, context):
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            frames = frame_range(self.frame_start, self.frame_end, self.step)
+            # step through the frames once for all objects
+            targets = [(key, indices) for ob, key, indices in targets if len(indices)]
+            if len(frames) and targets:
+                samples = sample_shape_key_values(context, targets, frames)
+                for (key, indices), values in zip(targets, samples):
+                    bake_shape_key_values(key, indices, frames, values, self.interpolation)
+            
+            count = sum(len(indices) for key, indices in targets) * len(frames)
+            self.report({'INFO'}, "%s Keyframes baked" % count)
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_exportShapeKeyValues(Operator, ExportHelper):
+    bl_idname = "shapekeyextras.export_values"
+    bl_label = "Export Values"
+    bl_description = "Write the evaluated Values of all Shape Keys in Selection over a Frame Range to a file"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".skx"
+    filter_glob: StringProperty(default="*.skx", options={'HIDDEN'})
+
+    frame_start: IntProperty(name="Start")
+    frame_end: IntProperty(name="End")
+    step: FloatProperty(name="Step", default=1, min=0.01)
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return ExportHelper.invoke(self, context, event)
+
+    @profiled
+    def execute(self, context):
+        targets = [t for t in shape_key_selections(self, context, skip_reference=True) if len(t[2])]
+        frames = frame_range(self.frame_start, self.frame_end, self.step)
+        if targets and len(frames):
+            count = export_shape_key_values(self.filepath, context, targets, frames)
+            self.report({'INFO'}, "%s frames of %s Shape Keys written" % (len(frames), count))
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_importShapeKeyValues(Operator, ImportHelper):
+    bl_idname = "shapekeyextras.import_values"
+    bl_label = "Import Values"
+    bl_description = "Read Shape Key Values from a file as Keyframes, Objects are matched by name or by their Shape Keys"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".skx"
+    filter_glob: StringProperty(default="*.skx", options={'HIDDEN'})
+
+    frame_offset: IntProperty(name="Frame Offset", default=0)
+    interpolation: EnumProperty(
+        name="Interpolation",
+        items=(
+        ('CONSTANT', "Constant", ""),
+        ('LINEAR', "Linear", ""),
+        ('BEZIER', "Bezier", "")
+        ),default='LINEAR')
+    decimate: BoolProperty(
+        name="Decimate", 
+        description="Only keep the Keyframes needed to reproduce the Values, only used with Linear interpolation",
+        default=False
+        )
+    tolerance: FloatProperty(name="Tolerance", default=0.001, min=0.0, precision=4)
+
+    @profiled
+    def execute(self, context):
+        objects = [ob for ob, key in shape_key_targets(context)]
+        try:
+            imported, missing = import_shape_key_values(self.filepath, objects, self.interpolation, 
+                self.tolerance if self.decimate else None, self.frame_offset)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        if missing:
+            self.report({'WARNING'}, "%s Shape Keys imported, %s not found" % (imported, missing))
+        else:
+            self.report({'INFO'}, "%s Shape Keys imported" % imported)
+        return {'FINISHED'}
+
+
+class SKE_OT_deleteShapeKeyKeyframe (Operator):
+    bl_idname = "shapekeyextras.delete_keyframe"
+    bl_label = "Remove current Keyframe"
+    bl_description = "Remove current Keyframe for all Shape Keys in Selection"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @profiled
+    def execute(self, context):
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                key_blocks = key.key_blocks
+                profile_writes(len(indices), len(indices))
+                for i in indices.tolist():
+                    try:
+                        key_blocks[i].keyframe_delete(data_path="value")
+                        self.report({'INFO'}, "Keyframes deleted.")
+                    except:
+                        self.report({'WARNING'}, "No Keyframe to remove.")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")    
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+
+# http://blender.stackexchange.com/questions/5827/get-shape-key-from-action-or-fcurve-in-python
+class SKE_OT_removeAllShapeKeyKeyframes(Operator):
+    bl_idname = "shapekeyextras.delete_all_keyframes"
+    bl_label = "Remove Animation"
+    bl_description = "Remove all Value Keyframes for all Shape Keys in Selection"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_frame_range: BoolProperty(
+        name="Scene Frame Range",
+        description="Only remove the Keyframes within the frame range of the scene",
+        default=False
+        )
+    
+    remove_empty_action: BoolProperty(
+        name="Remove empty Action",
+        description="Unlink the Action and remove it if it has no curves left",
+        default=False
+        )
+    
+    @profiled
+    def execute(self, context):
+        sce = context.scene
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            frames = None
+            if self.use_frame_range:
+                frames = (sce.frame_start, sce.frame_end)
+            
+            for ob, key, indices in targets:
+                remove_shape_key_animation(key, indices, frames, self.remove_empty_action)
+
+            self.report({'INFO'}, "All Keyframes removed.")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")    
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+
+class SKE_OT_removeShapeKeysSelected(Operator):
+    bl_idname = "shapekeyextras.remove_selection"
+    bl_label = "Remove Shape Keys"
+    bl_description = "Remove all Shape Keys in Selection"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled
+    def execute(self, context):
+        scn = context.scene
+        ske = scn.shape_key_extras
+        
+        targets = shape_key_selections(self, context)
+        if targets:
+            removed = 0
+            for ob, key, indices in targets:
+                if len(indices) > 0:
+                    removed += remove_shape_keys(ob, indices)
+            
+            if removed:
+                self.report({'INFO'}, "Selected Shape Keys removed")
+            else:
+                self.report({'INFO'}, "Nothing to remove")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")    
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
+
+class SKE_OT_printShapeKeySelection(Operator):
+    bl_idname = "shapekeyextras.print_shape_key_selection"
+    bl_label = "Print Selection to Console"
+    bl_description = "Print Shape Key Selection to the Console"
+    bl_options = {'INTERNAL'}
+    
+    @profiled
+    def execute(self, context):
+        targets = shape_key_selections(self, context)
+        if targets:
+            shape_keys = []
+            for ob, key, indices in targets:
+                names = shape_key_names(key, indices)
+                print ("Selection (%s):" % ob.name, ', '.join(names))
+                shape_keys.extend(names)
+            self.report({'INFO'}, ('Selection: %s' % (', '.join(shape_keys))))
+        else:
+            self.report({'WARNING'}, "No shape keys found.")    
+        return {'FINISHED'}
+
+
+class SKE_OT_moveShapeKey(bpy.types.Operator):
+    bl_idname = "shapekeyextras.move_shapekey"
+    bl_label = "Move Shape Key"
+    bl_description = "Move Shape Key up or down by certain amount or to a certain position"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    steps: IntProperty()
+    position: IntProperty(min=1, default=1)
+    action: EnumProperty(
+        items=(
+        ('DOWN','Down','', 'TRIA_DOWN', 1),
+        ('UP','Up','', 'TRIA_UP', 2),
+        ('TOP','Top','', 'TRIA_UP_BAR', 3),
+        ('BOTTOM','Bottom','', 'TRIA_DOWN_BAR', 4),
+        ('INDEX','Position','', 'FORWARD', 5)
+        ))
+    
+    @classmethod
+    def poll(cls, context):
+        return context.object.active_shape_key
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        row = self.layout
+        if self.action == 'INDEX':
+            row.prop(self, "position", text="Position")
+        elif self.action in {'UP', 'DOWN'}:
+            row.prop(self, "steps", text="Steps")
+        row.prop(self, "action", expand=True)
+        row.separator()
+        
+    @profiled
+    def execute(self, context):
+        ob = context.object
+        if ob.active_shape_key:
+            count = len(ob.data.shape_keys.key_blocks)
+            old_id = ob.active_shape_key_index
+            # the reference key only moves when asked to by steps
+            lowest = 0 if self.action in {'UP', 'DOWN'} else min(old_id, 1)
+            if self.action == 'DOWN':
+                target = old_id + self.steps
+            elif self.action == 'UP':
+                target = old_id - self.steps
+            elif self.action == 'TOP':
+                target = lowest
+            elif self.action == 'BOTTOM':
+                target = count - 1
+            else:
+                target = self.position - 1
+            
+            new_id = move_shape_key(ob, old_id, max(lowest, min(target, count - 1)))
+            info = 'Shape Key moved from %s to %s' % (old_id + 1, new_id + 1)
+            self.report({'INFO'}, info)
+            return {'FINISHED'}
+
+
+class SKE_OT_sortShapeKeys(Operator):
+    bl_idname = "shapekeyextras.sort_shapekeys"
+    bl_label = "Sort Shape Keys"
+    bl_description = "Sort all Shape Keys in Selection by Name, Value or Delta"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    sort_by: EnumProperty(
+        name="Sort by",
+        items=(
+        ('NAME', "Name", "Sort alphabetically"),
+        ('VALUE', "Value", "Sort by current value"),
+        ('DELTA', "Delta", "Sort by the largest offset to the relative key")
+        ))
+    reverse: BoolProperty(name="Reverse", default=False)
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            moves = 0
+            for ob, key, indices in targets:
+                moves += sort_shape_keys(ob, indices, self.sort_by, self.reverse)
+            self.report({'INFO'}, "Shape Keys sorted (%s moves)" % moves)
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+# -------------------------------------------------------------------
+#   Delta Operators    
+# -------------------------------------------------------------------
+
+def delta_mask(ske, ob):
+    if not ske.sk_delta_vgroup:
+        return None
+    return vertex_group_mask(ob, ske.sk_delta_vgroup, ske.sk_delta_invert)
+
+
+class SKE_OT_scaleShapeKeyDeltas(Operator):
+    bl_idname = "shapekeyextras.scale_deltas"
+    bl_label = "Scale Deltas"
+    bl_description = "Scale the offsets of all Shape Keys in Selection to their relative keys"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    factor: FloatProperty(name="Factor", default=1.0, soft_min=-2.0, soft_max=2.0)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                scale_shape_key_deltas(ob, indices, self.factor, delta_mask(ske, ob))
+                tag_shape_key_update(key)
+            self.report({'INFO'}, "Deltas scaled by %s" % round(self.factor, 3))
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_smoothShapeKeyDeltas(Operator):
+    bl_idname = "shapekeyextras.smooth_deltas"
+    bl_label = "Smooth Deltas"
+    bl_description = "Laplacian smooth the offsets of all Shape Keys in Selection along the mesh edges"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    iterations: IntProperty(name="Iterations", default=5, min=1, soft_max=100)
+    factor: FloatProperty(name="Factor", default=0.5, min=0.0, max=1.0)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                smooth_shape_key_deltas(ob, indices, self.iterations, self.factor, delta_mask(ske, ob))
+                tag_shape_key_update(key)
+            self.report({'INFO'}, "Deltas smoothed")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_maskShapeKeyDeltas(Operator):
+    bl_idname = "shapekeyextras.mask_deltas"
+    bl_label = "Mask Deltas"
+    bl_description = "Multiply the offsets of all Shape Keys in Selection by the Mask Vertex Group permanently"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    vertex_group: StringProperty(
+        name="Vertex Group",
+        description="Group to use instead of the Mask of the Scene",
+        default="", options={'SKIP_SAVE'}
+        )
+
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        name = self.vertex_group or ske.sk_delta_vgroup
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            masked = 0
+            for ob, key, indices in targets:
+                mask = vertex_group_mask(ob, name, ske.sk_delta_invert) if name else None
+                if mask is not None:
+                    mask_shape_key_deltas(ob, indices, mask)
+                    tag_shape_key_update(key)
+                    masked += 1
+            if masked:
+                self.report({'INFO'}, "Deltas masked by %s" % name)
+            else:
+                self.report({'WARNING'}, "No Mask Vertex Group found.")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_blendShapeKeys(Operator):
+    bl_idname = "shapekeyextras.blend_shapekeys"
+    bl_label = "Blend to New Key"
+    bl_description = "Add the offsets of all Shape Keys in Selection up into a new Shape Key"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    name: StringProperty(name="Name", default="Blend")
+    use_values: BoolProperty(
+        name="Use Values", 
+        description="Weight every key by its current value",
+        default=True
+        )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            for ob, key, indices in targets:
+                blend_shape_keys(ob, indices, self.name, self.use_values, delta_mask(ske, ob))
+                invalidate_selection_preview(key)
+                tag_shape_key_update(key)
+            self.report({'INFO'}, "%s added" % self.name)
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_bakeShapeKeyMix(Operator):
+    bl_idname = "shapekeyextras.bake_mix"
+    bl_label = "Bake Mix"
+    bl_description = "Bake the current mix of all unmuted Shape Keys of the Objects in Scope"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="Bake to",
+        items=(
+        ('NEW_KEY', "New Key", "Add the mix as a new Shape Key"),
+        ('NEW_MESH', "New Mesh", "Copy the Object with the mix as its Mesh, without Shape Keys"),
+        ('REPLACE_BASIS', "Basis", "Make the mix the reference key, the other keys keep their offsets"),
+        ))
+    name: StringProperty(name="Name", default="Mix")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        targets = shape_key_targets(context)
+        if not targets:
+            self.report({'WARNING'}, "No shape keys found.")
+            return {'FINISHED'}
+        # the mixed keys are set to 0, which only keeps the shape if the
+        # whole mix goes into the basis
+        if self.mode == 'REPLACE_BASIS' and ske.sk_delta_vgroup:
+            self.report({'ERROR'}, "Basis can not be replaced with a Mask Vertex Group, clear the Mask first")
+            return {'CANCELLED'}
+
+        baked = skipped = 0
+        for ob, key in targets:
+            # absolute keys are mixed by evaluation time, not by value
+            if not key.use_relative:
+                skipped += 1
+                continue
+            co, mixed = shape_key_mix(ob, delta_mask(ske, ob))
+            profile_count("keys", len(mixed))
+            if self.mode == 'NEW_KEY':
+                key_block = ob.shape_key_add(name=self.name, from_mix=False)
+                write_key_block_coords(key_block, co)
+                invalidate_selection_preview(key)
+            elif self.mode == 'NEW_MESH':
+                mix_to_mesh(ob, co, "%s_%s" % (ob.name, self.name))
+            else:
+                replace_reference_key(ob, co, mixed)
+            tag_shape_key_update(key)
+            baked += 1
+        
+        if skipped:
+            self.report({'WARNING'}, "%s Objects baked, %s with absolute Shape Keys skipped" % (baked, skipped))
+        else:
+            self.report({'INFO'}, "%s Objects baked" % baked)
+        return {'FINISHED'}
+
+
+class SKE_OT_splitShapeKeys(Operator):
+    bl_idname = "shapekeyextras.split_shapekeys"
+    bl_label = "Split"
+    bl_description = "Split all Shape Keys in Selection into sides or by the Vertex Groups in the Merge list"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="Split by",
+        items=(
+        ('SIDE', "Side", "Split into .L and .R halves along an axis"),
+        ('GROUPS', "Vertex Groups", "One key per Vertex Group in the Merge Vertex Groups list"),
+        ))
+    axis: EnumProperty(
+        name="Axis",
+        items=(('0', "X", ""), ('1', "Y", ""), ('2', "Z", "")),
+        default='0'
+        )
+    falloff: FloatProperty(
+        name="Falloff",
+        description="Distance from the center plane over which the sides are blended",
+        default=0.0, min=0.0, unit='LENGTH'
+        )
+    remove_original: BoolProperty(name="Remove Original", default=False)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "mode", expand=True)
+        if self.mode == 'SIDE':
+            row = layout.row()
+            row.prop(self, "axis", expand=True)
+            layout.prop(self, "falloff")
+        layout.prop(self, "remove_original")
+
+    @profiled
+    def execute(self, context):
+        group_input = [i.name for i in context.scene.shape_key_extras_collection if i.name]
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            added = found = 0
+            for ob, key, indices in targets:
+                if self.mode == 'SIDE':
+                    left = axis_side_weights(key_block_coords(key.reference_key), int(self.axis), self.falloff)
+                    masks = [(".L", left), (".R", 1.0 - left)]
+                else:
+                    group_names, matrix = vertex_group_matrix(ob, group_input)
+                    masks = [("_" + n, weights) for n, weights in zip(group_names, matrix)]
+                found += bool(masks)
+                if not masks or not len(indices):
+                    continue
+                
+                added += len(split_shape_keys(ob, indices, masks))
+                if self.remove_original:
+                    remove_shape_keys(ob, indices)
+                invalidate_selection_preview(key)
+                tag_shape_key_update(key)
+            
+            if added:
+                self.report({'INFO'}, "%s Shape Keys added" % added)
+            elif self.mode == 'GROUPS' and not found:
+                self.report({'WARNING'}, "None of the Vertex Groups in the list found on the Objects.")
+            else:
+                self.report({'WARNING'}, "No Shape Keys in Selection to split.")
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_analyzeShapeKeys(Operator):
+    bl_idname = "shapekeyextras.analyze_shapekeys"
+    bl_label = "Analyze"
+    bl_description = "Print the offsets and memory of all Shape Keys in Selection to the Console"
+    bl_options = {'REGISTER'}
+
+    @profiled
+    def execute(self, context):
+        threshold = context.scene.shape_key_extras.sk_empty_threshold
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            empty_count = empty_memory = 0
+            for ob, key, indices in targets:
+                stats = shape_key_delta_stats(ob, indices, threshold)
+                names = shape_key_names(key, indices)
+                empty = stats[:, 0] <= threshold
+                
+                print("Shape Keys (%s): %s, %s vertices, %s" % (ob.name, len(key.key_blocks), 
+                    len(ob.data.vertices), format_bytes(shape_key_memory(ob))))
+                for name, (max_delta, mean_delta, affected), is_empty in zip(names, stats.tolist(), empty.tolist()):
+                    print("  %-32s max %.6f  mean %.6f  %8d verts%s" % (
+                        name, max_delta, mean_delta, affected, "  (empty)" if is_empty else ""))
+                
+                empty_count += int(np.count_nonzero(empty))
+                empty_memory += shape_key_memory(ob, np.count_nonzero(empty))
+            
+            self.report({'INFO'}, "%s empty Shape Keys, %s" % (empty_count, format_bytes(empty_memory)))
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+class SKE_OT_cleanShapeKeys(Operator):
+    bl_idname = "shapekeyextras.clean_shapekeys"
+    bl_label = "Clean Empty"
+    bl_description = "Remove or merge all Shape Keys in Selection that move no vertex further than the Threshold"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action: EnumProperty(
+        name="Action",
+        items=(
+        ('REMOVE', "Remove", "Remove the empty keys"),
+        ('MERGE', "Merge", "Add the offsets of the empty keys up into one key and remove them"),
+        ))
+    name: StringProperty(name="Name", default="Merged")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    @profiled
+    def execute(self, context):
+        threshold = context.scene.shape_key_extras.sk_empty_threshold
+        targets = shape_key_selections(self, context, skip_reference=True)
+        if targets:
+            removed = memory = 0
+            for ob, key, indices in targets:
+                empty = indices[shape_key_delta_stats(ob, indices)[:, 0] <= threshold]
+                if not len(empty):
+                    continue
+                if self.action == 'MERGE' and len(empty) > 1:
+                    blend_shape_keys(ob, empty, self.name, use_values=False)
+                    memory -= shape_key_memory(ob, 1)
+                memory += shape_key_memory(ob, len(empty))
+                removed += remove_shape_keys(ob, empty)
+                tag_shape_key_update(key)
+            
+            self.report({'INFO'}, "%s Shape Keys removed, %s saved" % (removed, format_bytes(memory)))
+        else:
+            self.report({'WARNING'}, "No shape keys found.")
+        return {'FINISHED'}
+
+
+# -------------------------------------------------------------------
+#   Import Export Operators    
+# -------------------------------------------------------------------
+
+class SKE_OT_exportShapeKeys(Operator, ExportHelper):
+    bl_idname = "shapekeyextras.export_shapekeys"
+    bl_label = "Export Shape Keys"
+    bl_description = "Write the offsets and settings of all Shape Keys in Selection of the active Object to a file"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".skx"
+    filter_glob: StringProperty(default="*.skx", options={'HIDDEN'})
+
+    precision: EnumProperty(
+        name="Precision",
+        items=(
+        ('FLOAT32', "Float32", "Full precision"),
+        ('FLOAT16', "Float16", "Half the size, about 3 significant digits"),
+        ))
+    sparse: BoolProperty(
+        name="Sparse",
+        description="Only store the vertices that move",
+        default=True
+        )
+    tolerance: FloatProperty(
+        name="Tolerance",
+        description="Offsets up to this distance count as not moving",
+        default=0.0, min=0.0, precision=5, unit='LENGTH'
+        )
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.type == 'MESH' and context.object.data.shape_keys
+
+    @profiled
+    def execute(self, context):
+        indices = shape_key_selection(self, context, skip_reference=True)
+        if not len(indices):
+            self.report({'WARNING'}, "No shape keys found.")
+            return {'CANCELLED'}
+        
+        dtype = np.float16 if self.precision == 'FLOAT16' else np.float32
+        count = export_shape_key_deltas(self.filepath, context.object, indices, 
+            dtype, self.sparse, self.tolerance)
+        self.report({'INFO'}, "%s Shape Keys written to %s" % (count, self.filepath))
+        return {'FINISHED'}
+
+
+class SKE_OT_importShapeKeys(Operator, ImportHelper):
+    bl_idname = "shapekeyextras.import_shapekeys"
+    bl_label = "Import Shape Keys"
+    bl_description = "Read Shape Keys from a file into the active Object"
     bl_options = {'REGISTER', 'UNDO'}
-    
+
+    filename_ext = ".skx"
+    filter_glob: StringProperty(default="*.skx", options={'HIDDEN'})
+
+    replace: BoolProperty(
+        name="Replace",
+        description="Overwrite Shape Keys of the same name instead of adding new ones",
+        default=True
+        )
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.type == 'MESH' and context.mode == 'OBJECT'
+
+    @profiled
     def execute(self, context):
-        if context.object.data.shape_keys:       
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    context.object.data.shape_keys.key_blocks[i].keyframe_insert(data_path="value")
-            
-            self.report({'INFO'}, "Keyframes inserted")
+        ob = context.object
+        try:
+            imported, unresolved = import_shape_key_deltas(self.filepath, ob, self.replace)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        
+        invalidate_selection_preview(ob.data.shape_keys)
+        tag_shape_key_update(ob.data.shape_keys)
+        if unresolved:
+            self.report({'WARNING'}, "%s Shape Keys imported, relative keys not found (using %s): %s" % (
+                len(imported), ob.data.shape_keys.reference_key.name, ", ".join(sorted(set(unresolved)))))
         else:
-            self.report({'WARNING'}, "No shape keys found.")    
+            self.report({'INFO'}, "%s Shape Keys imported" % len(imported))
         return {'FINISHED'}
 
 
-class SKE_OT_deleteShapeKeyKeyframe (Operator):
-    bl_idname = "shapekeyextras.delete_keyframe"
-    bl_label = "Remove current Keyframe"
-    bl_description = "Remove current Keyframe for all Shape Keys in Selection"
+# -------------------------------------------------------------------
+#   Recipe Operators    
+# -------------------------------------------------------------------
+
+def run_recipe_step(context, step, ob, key, indices, rng):
+    # helpers only, no operator calls, so the whole recipe is one undo step
+    ske = context.scene.shape_key_extras
+    operation = step.operation
+    if operation in {'ENABLE', 'DISABLE', 'TOGGLE'}:
+        set_shape_key_mute(key, indices, operation)
+    elif operation == 'SET_VALUE':
+        set_shape_key_values(key, indices, step.value)
+    elif operation == 'SET_RANGE':
+        set_shape_key_range(key, indices, step.value, step.value_max)
+    elif operation == 'RANDOMIZE':
+        set_shape_key_values(key, indices, random_shape_key_values(key, indices, ske, rng)[0])
+    elif operation == 'INSERT_KEYFRAME':
+        frames = np.array([context.scene.frame_current], dtype=np.float32)
+        values = key_blocks_get(key.key_blocks, "value")[indices][np.newaxis]
+        bake_shape_key_values(key, indices, frames, values)
+    elif operation == 'REMOVE_KEYFRAMES':
+        remove_shape_key_animation(key, indices)
+    elif operation == 'REMOVE_DRIVERS':
+        key_blocks = key.key_blocks
+        for i in indices.tolist():
+            key_blocks[i].driver_remove("value")
+        profile_writes(len(indices), len(indices))
+    elif operation == 'SCALE_DELTAS':
+        scale_shape_key_deltas(ob, indices, step.value)
+    elif operation == 'REMOVE_EMPTY':
+        remove_shape_keys(ob, indices[shape_key_delta_stats(ob, indices)[:, 0] <= step.value])
+    elif operation == 'REMOVE':
+        remove_shape_keys(ob, indices)
+
+
+class SKE_OT_runRecipe(Operator):
+    bl_idname = "shapekeyextras.run_recipe"
+    bl_label = "Run Recipe"
+    bl_description = "Run all steps of the Recipe on the Objects in Scope as one undo step"
     bl_options = {'REGISTER', 'UNDO'}
-    
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.shape_key_extras_recipe)
+
+    @profiled
     def execute(self, context):
-        if context.object.data.shape_keys:       
-            shape_keys = shape_key_selection(self, context)
-            for i in shape_keys:
-                if i != 'Basis':
-                    try:
-                        context.object.data.shape_keys.key_blocks[i].keyframe_delete(data_path="value")
-                        self.report({'INFO'}, "Keyframes deleted.")
-                    except:
-                        self.report({'WARNING'}, "No Keyframe to remove.")
-        else:
-            self.report({'WARNING'}, "No shape keys found.")    
+        ske = context.scene.shape_key_extras
+        targets = shape_key_targets(context)
+        if not targets:
+            self.report({'WARNING'}, "No shape keys found.")
+            return {'FINISHED'}
+        
+        rng = random_generator(ske)
+        scene_selection = compile_selection(ske)
+        for step in context.scene.shape_key_extras_recipe:
+            selection = scene_selection if step.use_scene_selection else compile_selection(step)
+            skip_reference = step.operation not in {'ENABLE', 'DISABLE', 'TOGGLE', 'REMOVE'}
+            for ob, key in targets:
+                # removing every key removes the datablock
+                if ob.data.shape_keys != key:
+                    continue
+                indices = select_key_blocks(key, selection, skip_reference)
+                profile_count("keys", len(indices))
+                if len(indices):
+                    run_recipe_step(context, step, ob, key, indices, rng)
+        
+        for ob, key in targets:
+            if ob.data.shape_keys == key:
+                tag_shape_key_update(key)
+        self.report({'INFO'}, "Recipe of %s steps applied to %s Objects" % (
+            len(context.scene.shape_key_extras_recipe), len(targets)))
         return {'FINISHED'}
 
-    def invoke(self, context, event):
-        return context.window_manager.invoke_confirm(self, event)
 
-
-# http://blender.stackexchange.com/questions/5827/get-shape-key-from-action-or-fcurve-in-python
-class SKE_OT_removeAllShapeKeyKeyframes(Operator):
-    bl_idname = "shapekeyextras.delete_all_keyframes"
-    bl_label = "Remove Animation"
-    bl_description = "Remove all Value Keyframes for all Shape Keys in Selection"
+class SKE_OT_recipeActions(Operator):
+    bl_idname = "shapekeyextras.action_recipe"
+    bl_label = "Recipe Actions"
     bl_options = {'REGISTER', 'UNDO'}
-    
+
+    action: EnumProperty(
+        items=(
+            ('UP', "Up", ""),
+            ('DOWN', "Down", ""),
+            ('REMOVE', "Remove", ""),
+            ('ADD', "Add", ""),
+        )
+    )
+
     def execute(self, context):
-        sce = context.scene
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            sk_data = context.object.data.shape_keys
-            for i in shape_keys:
-                if i != 'Basis' and sk_data.animation_data is not None:
-                    for f in range(sce.frame_start, sce.frame_end+1):
-                        if sk_data.animation_data.action:
-                            sk_data.key_blocks[i].keyframe_delete(data_path="value", frame=f) #returns a bool
+        scn = context.scene
+        ske = scn.shape_key_extras
+        recipe = scn.shape_key_extras_recipe
+        idx = ske.sk_recipe_index
 
-            self.report({'INFO'}, "All Keyframes removed.")
-        else:
-            self.report({'WARNING'}, "No shape keys found.")    
+        if self.action == 'ADD':
+            # new steps start with the current selection of the scene
+            step = recipe.add()
+            for attr in ("sk_exclude", "sk_only", "sk_selection", "sk_source", "sk_set_name"):
+                setattr(step, attr, getattr(ske, attr))
+            ske.sk_recipe_index = len(recipe) - 1
+        elif 0 <= idx < len(recipe):
+            if self.action == 'DOWN' and idx < len(recipe) - 1:
+                recipe.move(idx, idx + 1)
+                ske.sk_recipe_index += 1
+            elif self.action == 'UP' and idx >= 1:
+                recipe.move(idx, idx - 1)
+                ske.sk_recipe_index -= 1
+            elif self.action == 'REMOVE':
+                recipe.remove(idx)
+                ske.sk_recipe_index = max(0, idx - 1)
         return {'FINISHED'}
-    
-    def invoke(self, context, event):
-        return context.window_manager.invoke_confirm(self, event)
 
 
-class SKE_OT_removeShapeKeysSelected(Operator):
-    bl_idname = "shapekeyextras.remove_selection"
-    bl_label = "Remove Shape Keys"
-    bl_description = "Remove all Shape Keys in Selection"
+# -------------------------------------------------------------------
+#   Selection Set Operators    
+# -------------------------------------------------------------------
+
+class SKE_OT_addSelectionSet(Operator):
+    bl_idname = "shapekeyextras.add_selection_set"
+    bl_label = "Add Selection Set"
+    bl_description = "Store the current Shape Key Selection as a new Set"
     bl_options = {'REGISTER', 'UNDO'}
 
+    name: StringProperty(name="Name", default="Set")
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.data.shape_keys
+
+    @profiled
     def execute(self, context):
-        scn = context.scene
-        ske = scn.shape_key_extras
+        key = context.object.data.shape_keys
+        mask = np.zeros(len(key.key_blocks), dtype=bool)
+        mask[shape_key_selection(self, context)] = True
         
-        if context.object.data.shape_keys:
-            shape_keys = shape_key_selection(self, context)
-            if len(shape_keys) > 0:
-                for i in shape_keys:            
-                    shapekey_index = context.object.data.shape_keys.key_blocks.keys().index(i)
-                    context.object.active_shape_key_index = shapekey_index
-                    bpy.ops.object.shape_key_remove()
-                              
-                self.report({'INFO'}, "Selected Shape Keys removed")
-            else:
-                self.report({'INFO'}, "Nothing to remove")
-        else:
-            self.report({'WARNING'}, "No shape keys found.")    
+        selection_set = key.shape_key_extras_sets.add()
+        selection_set.name = self.name
+        store_selection_set(selection_set, mask, key.key_blocks.keys())
+        key.shape_key_extras_sets_index = len(key.shape_key_extras_sets) - 1
+        
+        self.report({'INFO'}, "%s Shape Keys stored in %s" % (np.count_nonzero(mask), self.name))
         return {'FINISHED'}
 
-    def invoke(self, context, event):
-        return context.window_manager.invoke_confirm(self, event)
 
+class SKE_OT_removeSelectionSet(Operator):
+    bl_idname = "shapekeyextras.remove_selection_set"
+    bl_label = "Remove Selection Set"
+    bl_description = "Remove the active Selection Set"
+    bl_options = {'REGISTER', 'UNDO'}
 
-class SKE_OT_printShapeKeySelection(Operator):
-    bl_idname = "shapekeyextras.print_shape_key_selection"
-    bl_label = "Print Selection to Console"
-    bl_description = "Print Shape Key Selection to the Console"
-    bl_options = {'INTERNAL'}
-    
+    @classmethod
+    def poll(cls, context):
+        return (context.object and context.object.data.shape_keys and 
+            len(context.object.data.shape_keys.shape_key_extras_sets))
+
+    @profiled
     def execute(self, context):
-        if context.object.data.shape_keys:       
-            shape_keys = shape_key_selection(self, context)
-            self.report({'INFO'}, ('Selection: %s' % (', '.join(shape_keys))))
-            print ("Selection:", ', '.join(shape_keys))
-        else:
-            self.report({'WARNING'}, "No shape keys found.")    
+        key = context.object.data.shape_keys
+        idx = key.shape_key_extras_sets_index
+        if 0 <= idx < len(key.shape_key_extras_sets):
+            info = '%s removed' % (key.shape_key_extras_sets[idx].name)
+            key.shape_key_extras_sets.remove(idx)
+            key.shape_key_extras_sets_index = max(0, idx - 1)
+            self.report({'INFO'}, info)
         return {'FINISHED'}
 
 
-class SKE_OT_moveShapeKey(bpy.types.Operator):
-    bl_idname = "shapekeyextras.move_shapekey"
-    bl_label = "Move Shape Key"
-    bl_description = "Move Shape Key up or down by certain amount"
+class SKE_OT_combineSelectionSets(Operator):
+    bl_idname = "shapekeyextras.combine_selection_sets"
+    bl_label = "Combine Sets"
+    bl_description = "Combine the active Selection Set with the Set chosen as Source"
     bl_options = {'REGISTER', 'UNDO'}
-    
-    steps: IntProperty()
-    action: EnumProperty(
-        items=(
-        ('DOWN','Down','', 'TRIA_DOWN', 1),
-        ('UP','Up','', 'TRIA_UP', 2)
-        ))
-    
+
+    as_new: BoolProperty(
+        name="New Set", 
+        description="Store the result as a new Set instead of replacing the active one",
+        default=True
+        )
+
     @classmethod
     def poll(cls, context):
-        return context.object.active_shape_key
+        return (context.object and context.object.data.shape_keys and 
+            len(context.object.data.shape_keys.shape_key_extras_sets))
 
-    def invoke(self, context, event):
-        return context.window_manager.invoke_props_dialog(self)
+    @profiled
+    def execute(self, context):
+        ske = context.scene.shape_key_extras
+        key = context.object.data.shape_keys
+        sets = key.shape_key_extras_sets
+        names = key.key_blocks.keys()
+        
+        active = sets[key.shape_key_extras_sets_index]
+        other = sets.get(ske.sk_set_name)
+        if other is None:
+            self.report({'WARNING'}, "Choose a second Set in the Selection Source")
+            return {'CANCELLED'}
 
-    def draw(self, context):
-        row = self.layout
-        row.prop(self, "steps", text="Steps")
-        row.prop(self, "action", expand=True)
-        row.separator()
+        a, b = selection_set_mask(active, names)[0], selection_set_mask(other, names)[0]
+        if ske.sk_set_operation == 'UNION':
+            mask, symbol = a | b, "+"
+        elif ske.sk_set_operation == 'INTERSECT':
+            mask, symbol = a & b, "&"
+        else:
+            mask, symbol = a & ~b, "-"
         
-    def execute(self, context):
-        if context.object.active_shape_key:
-            old_id = context.object.active_shape_key_index
-            for i in range(self.steps):
-                if self.action == 'DOWN':
-                    bpy.ops.object.shape_key_move(type="DOWN")
-                else:
-                    bpy.ops.object.shape_key_move(type="UP")
-            
-            new_id = context.object.active_shape_key_index
-            info = 'Shape Key moved from %s to %s' % (old_id + 1, new_id + 1)
-            self.report({'INFO'}, info)
-            return {'FINISHED'}
+        if self.as_new:
+            name = "%s%s%s" % (active.name, symbol, other.name)
+            active = sets.add()
+            active.name = name
+            key.shape_key_extras_sets_index = len(sets) - 1
+        store_selection_set(active, mask, names)
+        
+        self.report({'INFO'}, "%s: %s Shape Keys" % (active.name, np.count_nonzero(mask)))
+        return {'FINISHED'}
 
 
 # -------------------------------------------------------------------
@@ -530,34 +3217,27 @@ class SKE_OT_mergeVertexGroups(Operator):
             context.mode == 'OBJECT' and
             len(context.active_object.vertex_groups) > 1)
     
+    @profiled
     def execute(self, context):
         group_input = {i.name for i in context.scene.shape_key_extras_collection if i.name}
         ob = context.active_object
 
-        group_lookup = {g.index: g.name for g in ob.vertex_groups}
-        group_candidates = {n for n in group_lookup.values() if n in group_input}
+        group_candidates = [g for g in ob.vertex_groups if g.name in group_input]
         
         if len(group_candidates) > 1:
-            # iterate through the vertices and sum the weights per group
-            vertex_weights = {}
-            for vert in ob.data.vertices:
-                if len(vert.groups):  
-                    for item in vert.groups:
-                        vg = ob.vertex_groups[item.group]
-                        if vg.name in group_candidates:
-                            if vert.index in vertex_weights:    
-                                vertex_weights[vert.index] += vg.weight(vert.index)
-                            else:
-                                vertex_weights[vert.index] = vg.weight(vert.index)
-                        
+            # collect the weights of all groups in one sweep and reduce them
+            verts, groups, weights = vertex_group_weights(ob, [g.index for g in group_candidates])
+            verts, weights = merge_vertex_group_weights(
+                verts, weights, len(group_candidates), context.scene.shape_key_extras.vg_merge_mode)
+            
             # create new vertex group
-            vgroup = ob.vertex_groups.new(name="+".join(group_candidates))
+            group_names = [g.name for g in group_candidates]
+            vgroup = ob.vertex_groups.new(name="+".join(group_names))
             
-            # add the values to the group                       
-            for key, value in vertex_weights.items():
-                vgroup.add([key], value ,'REPLACE') #'ADD','SUBTRACT'
+            # add the values to the group
+            write_vertex_group_weights(vgroup, verts, weights)
             
-            self.report({'INFO'}, ('Merged: %s' % (', '.join(group_candidates))))
+            self.report({'INFO'}, ('Merged: %s' % (', '.join(group_names))))
             return{'FINISHED'}
         
         else:
@@ -565,12 +3245,56 @@ class SKE_OT_mergeVertexGroups(Operator):
             return{'CANCELLED'}
 
 
+class SKE_OT_deltaToVertexGroup(Operator):
+    bl_idname = "shapekeyextras.delta_to_vertex_group"
+    bl_label = "Delta to Vertex Group"
+    bl_description = "Create a Vertex Group from the offsets of the active Shape Key to its relative key"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    normalize: BoolProperty(
+        name="Normalize", 
+        description="Scale the weights so that the largest offset gets a weight of 1",
+        default=True
+        )
+    threshold: FloatProperty(
+        name="Threshold",
+        description="Leave vertices that move less than this out of the group",
+        default=0.0001, min=0.0, precision=5, unit='LENGTH'
+        )
+    @classmethod
+    def poll(cls, context):
+        ob = context.active_object
+        return (ob and ob.type == 'MESH' and ob.active_shape_key_index > 0 and
+            context.mode == 'OBJECT')
+
+    @profiled
+    def execute(self, context):
+        ob = context.active_object
+        key_block = ob.active_shape_key
+        lengths = np.linalg.norm(key_block_deltas(key_block), axis=1)
+        
+        verts = np.flatnonzero(lengths > self.threshold)
+        if not len(verts):
+            self.report({'WARNING'}, "%s has no offsets." % key_block.name)
+            return {'CANCELLED'}
+        
+        weights = lengths[verts]
+        if self.normalize:
+            weights = weights / weights.max()
+        vgroup = ob.vertex_groups.new(name=key_block.name)
+        write_vertex_group_weights(vgroup, verts, weights.astype(np.float32))
+        ob.vertex_groups.active_index = vgroup.index
+        self.report({'INFO'}, "%s: %s vertices" % (vgroup.name, len(verts)))
+        return {'FINISHED'}
+
+
 class SKE_OT_printVertexGroups(Operator):
     bl_idname = "shapekeyextras.print_vg_ui_list"
     bl_label = "Print Selection"
     bl_description = "Print Vertex Group Selection to Console"
     bl_options = {'INTERNAL'}
 
+    @profiled
     def execute(self, context):
         selection = {i.name for i in context.scene.shape_key_extras_collection if i.name}
         if selection:
@@ -586,6 +3310,7 @@ class SKE_OT_addVertexGroups(Operator):
     bl_description = "Add all Vertex Groups to the List"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
@@ -622,6 +3347,7 @@ class SKE_OT_clearVertexGroups(Operator):
     bl_description = "Clear all Items in Vertex Group list"
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled
     def execute(self, context):
         scn = context.scene
         ske = scn.shape_key_extras
@@ -671,6 +3397,8 @@ def shapekey_panel_append(self, context):
             #row = box_set_attributes.row()
             col = box_set_attributes.column(align=True)
             rowsub = col.row(align=True)
+            rowsub.prop(ske, "sk_scope", expand=True)
+            rowsub = col.row(align=True)
             rowsub.prop(ske, "sk_selection", expand=True)
 
             box_selection = col.box()
@@ -680,18 +3408,49 @@ def shapekey_panel_append(self, context):
                 icon_only=True, emboss=False)
 
             row.label(text="Custom Selection")
+            key = context.object.data.shape_keys
+            key_count, match_count, match_names = selection_preview(context, key)
+            row.label(text="%s of %s keys match" % (match_count, key_count))
             if ske.sk_advanced_selection:
                 row = box_selection.row()
                 col = row.column(align=True)
                 rowsub = col.row(align=True)
-                rowsub = col.row(align=True)
-                rowsub.prop(ske, "sk_exclude")
-                rowsub = col.column(align=True)
-                rowsub.prop(ske, "sk_only")
+                rowsub.prop(ske, "sk_source", expand=True)
+                if ske.sk_source == 'SET':
+                    rowsub = col.row(align=True)
+                    rowsub.prop_search(ske, "sk_set_name", key, "shape_key_extras_sets", icon="GROUP")
+                else:
+                    rowsub = col.row(align=True)
+                    rowsub.prop(ske, "sk_exclude")
+                    rowsub = col.column(align=True)
+                    rowsub.prop(ske, "sk_only")
                 row = box_selection.row()
                 col = box_selection.column(align=True)
                 rowsub = col.row(align=True)
                 rowsub.operator("shapekeyextras.print_shape_key_selection", icon="CONSOLE")
+                rowsub.prop(ske, "sk_list_filter", icon="FILTER", toggle=True)
+                if match_names:
+                    more = match_count - len(match_names)
+                    col.label(text=", ".join(match_names) + (" +%s" % more if more else ""))
+
+            box_sets = col.box()
+            row = box_sets.row()
+            row.prop(ske, "sk_show_sets",
+                icon="TRIA_DOWN" if ske.sk_show_sets else "TRIA_RIGHT",
+                icon_only=True, emboss=False)
+
+            row.label(text="Selection Sets")
+            if ske.sk_show_sets:
+                row = box_sets.row()
+                row.template_list("SKE_UL_selectionSets", "", key, "shape_key_extras_sets", 
+                    key, "shape_key_extras_sets_index", rows=3)
+                col = row.column(align=True)
+                col.operator("shapekeyextras.add_selection_set", icon='ZOOM_IN', text="")
+                col.operator("shapekeyextras.remove_selection_set", icon='ZOOM_OUT', text="")
+                col = box_sets.column(align=True)
+                rowsub = col.row(align=True)
+                rowsub.prop(ske, "sk_set_operation", expand=True)
+                col.operator("shapekeyextras.combine_selection_sets", icon="SELECT_EXTEND")
 
             col.separator()
             row = box_set_attributes.row()
@@ -701,7 +3460,11 @@ def shapekey_panel_append(self, context):
             rowsub = col.row(align=True)
             rowsub.prop(ske, "sk_random_min")
             rowsub.prop(ske, "sk_random_max")
+            rowsub = col.row(align=True)
+            rowsub.prop(ske, "sk_random_seed")
+            rowsub.prop(ske, "sk_random_distribution", text="")
             col.operator("shapekeyextras.randomize", icon="KEYINGSET")
+            col.operator("shapekeyextras.bake_random", icon="RNDCURVE")
             col.operator("shapekeyextras.set_range", icon="SORTSIZE")
             col.separator()
 
@@ -709,6 +3472,10 @@ def shapekey_panel_append(self, context):
             col = row.column(align=True)
             rowsub = col.row(align=True)
             rowsub.operator("shapekeyextras.insert_keyframe", icon="ACTION")
+            rowsub.operator("shapekeyextras.bake_keyframes", icon="REC")
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.export_values", icon="EXPORT")
+            rowsub.operator("shapekeyextras.import_values", icon="IMPORT")
             rowsub = col.row(align=True)
             rowsub.operator("shapekeyextras.delete_keyframe", icon="PANEL_CLOSE")
             rowsub.operator("shapekeyextras.delete_all_keyframes", icon="PANEL_CLOSE")
@@ -719,8 +3486,94 @@ def shapekey_panel_append(self, context):
             rowsub = col.row(align=True)
             rowsub.operator("shapekeyextras.add_drivers", icon="DRIVER")
             rowsub.operator("shapekeyextras.remove_drivers", icon="PANEL_CLOSE")
+            col.operator("shapekeyextras.add_template_drivers", icon="DRIVER_TRANSFORM")
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.audit_drivers", icon="VIEWZOOM")
+            rowsub.operator("shapekeyextras.fix_drivers", icon="TOOL_SETTINGS")
             rowsub = col.row(align=True)
             rowsub.operator("shapekeyextras.remove_selection", icon="CANCEL")
+            col.separator()
+
+            row = box_set_attributes.row()
+            col = row.column(align=True)
+            rowsub = col.row(align=True)
+            rowsub.prop_search(ske, "sk_delta_vgroup", context.object, "vertex_groups")
+            rowsub.prop(ske, "sk_delta_invert", icon="ARROW_LEFTRIGHT", icon_only=True)
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.scale_deltas", icon="FULLSCREEN_ENTER")
+            rowsub.operator("shapekeyextras.smooth_deltas", icon="MOD_SMOOTH")
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.mask_deltas", icon="MOD_MASK")
+            rowsub.operator("shapekeyextras.blend_shapekeys", icon="SELECT_EXTEND")
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.split_shapekeys", icon="MOD_MIRROR")
+            rowsub.operator("shapekeyextras.bake_mix", icon="SHAPEKEY_DATA")
+            col.separator()
+            col.prop(ske, "sk_empty_threshold")
+            rowsub = col.row(align=True)
+            rowsub.operator("shapekeyextras.analyze_shapekeys", icon="VIEWZOOM")
+            rowsub.operator("shapekeyextras.clean_shapekeys", icon="BRUSH_DATA")
+
+        box_recipe = layout.box()
+        row = box_recipe.row()
+        row.prop(ske, "sk_show_recipe",
+            icon="TRIA_DOWN" if ske.sk_show_recipe else "TRIA_RIGHT",
+            icon_only=True, emboss=False)
+
+        row.label(text="Recipe")
+        if ske.sk_show_recipe:
+            recipe = scn.shape_key_extras_recipe
+            row = box_recipe.row()
+            row.template_list("SKE_UL_recipeSteps", "", scn, "shape_key_extras_recipe", 
+                ske, "sk_recipe_index", rows=4)
+            col = row.column(align=True)
+            col.operator("shapekeyextras.action_recipe", icon='ZOOM_IN', text="").action = 'ADD'
+            col.operator("shapekeyextras.action_recipe", icon='ZOOM_OUT', text="").action = 'REMOVE'
+            col.separator()
+            col.operator("shapekeyextras.action_recipe", icon='TRIA_UP', text="").action = 'UP'
+            col.operator("shapekeyextras.action_recipe", icon='TRIA_DOWN', text="").action = 'DOWN'
+
+            if 0 <= ske.sk_recipe_index < len(recipe):
+                step = recipe[ske.sk_recipe_index]
+                col = box_recipe.column(align=True)
+                col.prop(step, "operation", text="")
+                if step.operation in {'SET_VALUE', 'SCALE_DELTAS', 'REMOVE_EMPTY'}:
+                    col.prop(step, "value")
+                elif step.operation == 'SET_RANGE':
+                    rowsub = col.row(align=True)
+                    rowsub.prop(step, "value", text="Min")
+                    rowsub.prop(step, "value_max")
+                col.prop(step, "use_scene_selection")
+                if not step.use_scene_selection:
+                    rowsub = col.row(align=True)
+                    rowsub.prop(step, "sk_selection", expand=True)
+                    rowsub = col.row(align=True)
+                    rowsub.prop(step, "sk_source", expand=True)
+                    if step.sk_source == 'SET':
+                        col.prop_search(step, "sk_set_name", context.object.data.shape_keys, 
+                            "shape_key_extras_sets", icon="GROUP")
+                    else:
+                        col.prop(step, "sk_exclude")
+                        col.prop(step, "sk_only")
+            box_recipe.operator("shapekeyextras.run_recipe", icon="PLAY")
+
+        box_profile = layout.box()
+        row = box_profile.row()
+        row.prop(ske, "sk_show_profile",
+            icon="TRIA_DOWN" if ske.sk_show_profile else "TRIA_RIGHT",
+            icon_only=True, emboss=False)
+        
+        row.label(text="Profiling")
+        if ske.sk_show_profile:
+            row = box_profile.row()
+            row.prop(ske, "sk_profile")
+            col = box_profile.column(align=True)
+            for record in _profile_records:
+                col.label(text="%s: %.1f ms, %s keys, %s writes (%s values), %s ops" % (
+                    record["operator"].split(".")[-1], record["time"] * 1000, 
+                    record["keys"], record["rna_writes"], record["rna_elements"], record["ops"]))
+            if ske.sk_profile:
+                box_profile.label(text=profile_log_path(), icon="TEXT")
 
         layout.separator()
 
@@ -791,6 +3644,31 @@ class SKE_OT_vertexGroupActions(Operator):
         return {"FINISHED"}
 
 
+class SKE_UL_selectionSets(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        mask, missing = selection_set_mask(item, data.key_blocks.keys())
+        split = layout.split(factor=0.75)
+        split.prop(item, "name", text="", emboss=False, icon="GROUP")
+        row = split.row()
+        row.alignment = 'RIGHT'
+        row.label(text=str(np.count_nonzero(mask)))
+        # keys of the set were removed outside of the add-on
+        if missing:
+            row.label(text="", icon="ERROR")
+
+
+class SKE_UL_recipeSteps(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        split = layout.split(factor=0.5)
+        split.label(text="%s. %s" % (index + 1, item.bl_rna.properties["operation"].enum_items[item.operation].name))
+        if item.use_scene_selection:
+            split.label(text="Scene Selection")
+        elif item.sk_source == 'SET':
+            split.label(text=item.sk_set_name, icon="GROUP")
+        else:
+            split.label(text=item.sk_only or item.sk_exclude and "not " + item.sk_exclude or "All")
+
+
 class SKE_UL_vertexGroups(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         split = layout.split(factor=0.1)
@@ -800,14 +3678,30 @@ class SKE_UL_vertexGroups(UIList):
 
 
 def vertexgroup_panel_append(self, context):
-    if (context.active_object.type == 'MESH' and 
-        len(context.active_object.vertex_groups) > 1 and
-        context.mode == 'OBJECT'):
-        
-        scn = context.scene
-        ske = scn.shape_key_extras
-        layout = self.layout
+    ob = context.active_object
+    if ob.type != 'MESH' or context.mode != 'OBJECT':
+        return
+
+    scn = context.scene
+    ske = scn.shape_key_extras
+    layout = self.layout
+
+    if ob.data.shape_keys:
+        box_weights = layout.box()
+        row = box_weights.row()
+        row.prop(ske, "vg_shape_key_weights",
+            icon="TRIA_DOWN" if ske.vg_shape_key_weights else "TRIA_RIGHT",
+            icon_only=True, emboss=False
+        )
+        row.label(text="Shape Key Weights")
+        if ske.vg_shape_key_weights:
+            col = box_weights.column(align=True)
+            col.operator("shapekeyextras.delta_to_vertex_group", icon="GROUP_VERTEX")
+            if ob.vertex_groups.active:
+                col.operator("shapekeyextras.mask_deltas", text="Apply Group as Mask", 
+                    icon="MOD_MASK").vertex_group = ob.vertex_groups.active.name
 
+    if len(ob.vertex_groups) > 1:
         box_merge_vgroups = layout.box()
         row = box_merge_vgroups.row()
         row.prop(ske, "vg_merge_vgroups",
@@ -834,8 +3728,10 @@ def vertexgroup_panel_append(self, context):
             #rowsub.operator("shapekeyextras.print_vg_ui_list", icon="WORDWRAP_ON")
             rowsub.operator("shapekeyextras.add_all_vg_ui_list", icon="WORDWRAP_ON")
             rowsub.operator("shapekeyextras.clear_vg_ui_list", icon="X")
+            col.prop(ske, "vg_merge_mode", text="")
             col.operator("shapekeyextras.merge_vg_ui_list", icon="STICKY_UVS_LOC")
 
+    if ob.data.shape_keys or len(ob.vertex_groups) > 1:
         layout.separator()
 
 
@@ -843,6 +3739,11 @@ def shapekey_specials_append(self, context):
     layout = self.layout
     row = layout.row(align=True)
     row.operator("shapekeyextras.move_shapekey", icon="PHYSICS")
+    row = layout.row(align=True)
+    row.operator("shapekeyextras.sort_shapekeys", icon="SORTALPHA")
+    layout.separator()
+    layout.operator("shapekeyextras.export_shapekeys", icon="EXPORT")
+    layout.operator("shapekeyextras.import_shapekeys", icon="IMPORT")
 
 
 class DrawShapeKeyListItem:
@@ -872,8 +3773,74 @@ class DrawShapeKeyListItem:
             layout.alignment = 'CENTER'
             layout.label(text="", icon_value=icon)
 
-    # built-in method ../startup/bl_ui/properties_data_mesh.py
+    def filter_items(self, context, data, propname):
+        key_blocks = getattr(data, propname)
+        ske = context.scene.shape_key_extras
+        count = len(key_blocks)
+        selection = compile_selection(ske) if ske.sk_list_filter else None
+        
+        # the flags and the order only change with the names,
+        # mute states or the filter settings
+        if DrawShapeKeyListItem._filter_items is None:
+            names = tuple(key_blocks.keys())
+            mute = None
+            if selection is not None and selection.state != 'ALL':
+                mute = key_blocks_get(key_blocks, "mute", bool).tobytes()
+            selection_set = None
+            if selection is not None and selection.source == 'SET':
+                selection_set = data.shape_key_extras_sets.get(selection.set_name)
+            signature = (names, mute, selection, 
+                None if selection_set is None else (selection_set.bits, selection_set.layout, selection_set.members),
+                self.filter_name, self.use_filter_invert, self.use_filter_sort_alpha, 
+                self.bitflag_filter_item)
+            
+            cache_id = data.as_pointer()
+            cached = _list_filter_cache.get(cache_id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            
+            flags = np.full(count, self.bitflag_filter_item, dtype=np.int64)
+            if self.filter_name:
+                pattern = self.filter_name.lower()
+                if not pattern.startswith("*"):
+                    pattern = "*" + pattern
+                if not pattern.endswith("*"):
+                    pattern += "*"
+                match = re.compile(fnmatch.translate(pattern)).match
+                found = np.fromiter((match(n.lower()) is not None for n in names), 
+                    dtype=bool, count=count)
+                flags[~found] = 0
+            
+            order = []
+            if self.use_filter_sort_alpha:
+                ranking = sorted(range(count), key=lambda i: names[i].lower())
+                order = np.empty(count, dtype=np.int64)
+                order[ranking] = np.arange(count)
+                order = order.tolist()
+        else:
+            flags, order = DrawShapeKeyListItem._filter_items(self, context, data, propname)
+            flags = np.array(flags, dtype=np.int64) if len(flags) else \
+                np.full(count, self.bitflag_filter_item, dtype=np.int64)
+        
+        # hide everything outside of the add-on selection, except the basis,
+        # the list inverts the flags, so hidden keys are flagged instead
+        if selection is not None and count:
+            hidden = np.ones(count, dtype=bool)
+            hidden[select_key_blocks(data, selection)] = False
+            hidden[0] = False
+            flags[hidden] = self.bitflag_filter_item if self.use_filter_invert else 0
+        
+        result = (flags.tolist(), order)
+        if DrawShapeKeyListItem._filter_items is None:
+            _list_filter_cache.pop(cache_id, None)
+            if len(_list_filter_cache) >= _selection_cache_size:
+                del _list_filter_cache[next(iter(_list_filter_cache))]
+            _list_filter_cache[cache_id] = (signature, result)
+        return result
+
+    # built-in methods ../startup/bl_ui/properties_data_mesh.py
     _draw = bpy.types.MESH_UL_shape_keys.draw_item
+    _filter_items = bpy.types.MESH_UL_shape_keys.__dict__.get("filter_items")
 
 
 # -------------------------------------------------------------------
@@ -883,26 +3850,54 @@ class DrawShapeKeyListItem:
 classes = (
     SKE_PG_sceneSettings,
     SKE_PT_indexShapeKeys,
+    SKE_PG_selectionSet,
+    SKE_PG_recipeStep,
     SKE_OT_enableShapeKeys,
     SKE_OT_disableShapeKeys,
     SKE_OT_toggleShapeKeys,
     SKE_OT_randomShapeKeyEnable,
     SKE_OT_randomShapeKeyValue,
+    SKE_OT_bakeRandomShapeKeyValues,
     SKE_OT_setShapeKeyRange,
     SKE_OT_applyShapeKeyValue,
     SKE_OT_removeShapeKeyDriver,
+    SKE_OT_auditShapeKeyDrivers,
+    SKE_OT_fixShapeKeyDrivers,
     SKE_OT_addShapeKeyDriver,
+    SKE_OT_addShapeKeyDriverTemplate,
     SKE_OT_addShapeKeyKeyframe,
+    SKE_OT_bakeShapeKeyKeyframes,
+    SKE_OT_exportShapeKeyValues,
+    SKE_OT_importShapeKeyValues,
     SKE_OT_deleteShapeKeyKeyframe,
     SKE_OT_removeAllShapeKeyKeyframes,
     SKE_OT_removeShapeKeysSelected,
     SKE_OT_printShapeKeySelection,
     SKE_OT_moveShapeKey,
+    SKE_OT_sortShapeKeys,
+    SKE_OT_scaleShapeKeyDeltas,
+    SKE_OT_smoothShapeKeyDeltas,
+    SKE_OT_maskShapeKeyDeltas,
+    SKE_OT_blendShapeKeys,
+    SKE_OT_bakeShapeKeyMix,
+    SKE_OT_splitShapeKeys,
+    SKE_OT_analyzeShapeKeys,
+    SKE_OT_cleanShapeKeys,
+    SKE_OT_exportShapeKeys,
+    SKE_OT_importShapeKeys,
+    SKE_OT_addSelectionSet,
+    SKE_OT_removeSelectionSet,
+    SKE_OT_combineSelectionSets,
+    SKE_OT_runRecipe,
+    SKE_OT_recipeActions,
     SKE_OT_mergeVertexGroups,
+    SKE_OT_deltaToVertexGroup,
     SKE_OT_printVertexGroups,
     SKE_OT_addVertexGroups,
     SKE_OT_clearVertexGroups,
     SKE_OT_vertexGroupActions,
+    SKE_UL_selectionSets,
+    SKE_UL_recipeSteps,
     SKE_UL_vertexGroups,
     # DrawShapeKeyListItem,
 )
@@ -914,23 +3909,250 @@ def register():
     
     bpy.types.Scene.shape_key_extras = PointerProperty(type=SKE_PG_sceneSettings)
     bpy.types.Scene.shape_key_extras_collection = CollectionProperty(type=SKE_PT_indexShapeKeys)
+    bpy.types.Scene.shape_key_extras_recipe = CollectionProperty(type=SKE_PG_recipeStep)
+    bpy.types.Key.shape_key_extras_sets = CollectionProperty(type=SKE_PG_selectionSet)
+    bpy.types.Key.shape_key_extras_sets_index = IntProperty()
     bpy.types.DATA_PT_shape_keys.append(shapekey_panel_append)
     bpy.types.DATA_PT_vertex_groups.append(vertexgroup_panel_append)
     bpy.types.MESH_MT_shape_key_context_menu.append(shapekey_specials_append)
-    bpy.types.MESH_UL_shape_keys.draw_item = DrawShapeKeyListItem.draw
+    
+    subscribe_selection_preview()
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, 
+            bpy.app.handlers.redo_post):
+        handlers.append(selection_preview_handler)
+    
+    # callbacks are only picked up on registration, so the built-in
+    # list is registered again with filter_items
+    shape_key_list = bpy.types.MESH_UL_shape_keys
+    bpy.utils.unregister_class(shape_key_list)
+    shape_key_list.draw_item = DrawShapeKeyListItem.draw
+    shape_key_list.filter_items = DrawShapeKeyListItem.filter_items
+    bpy.utils.register_class(shape_key_list)
 
 def unregister():
     bpy.types.DATA_PT_shape_keys.remove(shapekey_panel_append)
     bpy.types.DATA_PT_vertex_groups.remove(vertexgroup_panel_append)
     bpy.types.MESH_MT_shape_key_context_menu.remove(shapekey_specials_append)
-    bpy.types.MESH_UL_shape_keys.draw_item = DrawShapeKeyListItem._draw
+    
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    close_profile_logger()
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, 
+            bpy.app.handlers.redo_post):
+        if selection_preview_handler in handlers:
+            handlers.remove(selection_preview_handler)
+    
+    shape_key_list = bpy.types.MESH_UL_shape_keys
+    bpy.utils.unregister_class(shape_key_list)
+    shape_key_list.draw_item = DrawShapeKeyListItem._draw
+    if DrawShapeKeyListItem._filter_items is None:
+        del shape_key_list.filter_items
+    else:
+        shape_key_list.filter_items = DrawShapeKeyListItem._filter_items
+    bpy.utils.register_class(shape_key_list)
 
     from bpy.utils import unregister_class
     for cls in reversed(classes):
         unregister_class(cls)
 
+    del bpy.types.Key.shape_key_extras_sets_index
+    del bpy.types.Key.shape_key_extras_sets
+    del bpy.types.Scene.shape_key_extras_recipe
     del bpy.types.Scene.shape_key_extras_collection
     del bpy.types.Scene.shape_key_extras
 
-if __name__ == "__main__":
+
+# -------------------------------------------------------------------
+#   Command Line
+# -------------------------------------------------------------------
+
+# blender -b --python shape-key-extras.py -- --op disable_all --set sk_only="EYE_" -- *.blend
+#
+# The first Blender process spreads the files across a pool of worker
+# processes (one Blender instance per file), each worker applies the 
+# operations and writes a <file>.ske.json summary
+
+def cli_operators():
+    # operators that can run without a UI
+    return {cls.bl_idname.split(".")[1]: cls for cls in classes 
+        if issubclass(cls, Operator) and cls.bl_idname.startswith("shapekeyextras.") and
+        callable(getattr(cls, "execute", None))}
+
+def cli_parse_value(value):
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+def cli_parse_pairs(pairs):
+    result = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError("Expected NAME=VALUE, got '%s'" % pair)
+        result[name.strip()] = cli_parse_value(value)
+    return result
+
+def cli_parse_args(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python shape-key-extras.py --",
+        description="Apply Shape Key Extras operations to many .blend files")
+    parser.add_argument("files", nargs="*", help=".blend files to process, after a -- separator")
+    parser.add_argument("--op", nargs="+", action="append", default=[], metavar="ARG",
+        help="Operation followed by optional PROP=VALUE pairs, can be repeated (e.g. --op set_values)")
+    parser.add_argument("--set", action="append", default=[], metavar="SETTING=VALUE",
+        help="Scene setting of the add-on, can be repeated (e.g. --set sk_value=0.5)")
+    parser.add_argument("--scope", default='SCENE', 
+        choices=('ACTIVE', 'SELECTED', 'COLLECTION', 'SCENE'))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+        help="Number of Blender processes to run in parallel")
+    parser.add_argument("--dry-run", action="store_true",
+        help="Report the selection per object without changing or saving the files")
+    parser.add_argument("--summary-dir", default="",
+        help="Folder for the JSON summaries, next to each file by default")
+    parser.add_argument("--blender", default=bpy.app.binary_path,
+        help="Blender executable of the workers")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    operators = cli_operators()
+    args.operations = []
+    for op in args.op:
+        if op[0] not in operators:
+            parser.error("Unknown operation '%s', choose from: %s" % (op[0], ", ".join(sorted(operators))))
+        # --op takes every following argument, files have to be separated
+        for pair in op[1:]:
+            if "=" not in pair:
+                parser.error("Expected PROP=VALUE after --op %s, got '%s' (put -- before the files)" % (op[0], pair))
+        args.operations.append((op[0], cli_parse_pairs(op[1:])))
+    try:
+        args.settings = cli_parse_pairs(args.set)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def cli_summary_path(args, filepath):
+    folder = args.summary_dir or os.path.dirname(filepath)
+    return os.path.join(folder, os.path.basename(filepath) + ".ske.json")
+
+def cli_run_worker(args):
     register()
+    context = bpy.context
+    ske = context.scene.shape_key_extras
+    summary = {
+        "file": bpy.data.filepath,
+        "dry_run": args.dry_run,
+        "scope": args.scope,
+        "settings": args.settings,
+        "objects": [],
+        "operations": [],
+        "saved": False,
+        "status": 'OK'
+        }
+    
+    try:
+        ske.sk_scope = args.scope
+        for name, value in args.settings.items():
+            setattr(ske, name, value)
+        
+        for ob, key, indices in shape_key_selections(None, context):
+            summary["objects"].append({
+                "object": ob.name,
+                "key": key.name,
+                "shape_keys": len(key.key_blocks),
+                "selected": shape_key_names(key, indices)
+                })
+        
+        for name, properties in args.operations:
+            entry = {"operation": name, "properties": properties, "result": ['SKIPPED']}
+            if not args.dry_run:
+                start = time.perf_counter()
+                entry["result"] = sorted(getattr(bpy.ops.shapekeyextras, name)(**properties))
+                entry["time"] = time.perf_counter() - start
+            summary["operations"].append(entry)
+        
+        if not args.dry_run and args.operations:
+            bpy.ops.wm.save_mainfile()
+            summary["saved"] = True
+    
+    except Exception as e:
+        summary["status"] = 'FAILED'
+        summary["error"] = "%s: %s" % (type(e).__name__, e)
+    
+    with open(cli_summary_path(args, bpy.data.filepath), "w") as f:
+        json.dump(summary, f, indent=2)
+    
+    if summary["status"] != 'OK':
+        print(summary["error"])
+        sys.exit(1)
+
+def cli_run_file(args, filepath):
+    import subprocess
+    
+    command = [args.blender, "-b", "--factory-startup", filepath, 
+        "--python-exit-code", "1", "--python", os.path.abspath(__file__), 
+        "--", "--worker", "--scope", args.scope]
+    for op in args.op:
+        command += ["--op"] + op
+    for setting in args.set:
+        command += ["--set", setting]
+    if args.dry_run:
+        command.append("--dry-run")
+    if args.summary_dir:
+        command += ["--summary-dir", args.summary_dir]
+
+    # a summary of an earlier run must not pass for the result of a crash
+    summary_path = cli_summary_path(args, filepath)
+    if os.path.exists(summary_path):
+        os.remove(summary_path)
+
+    process = subprocess.run(command, stdout=subprocess.PIPE, 
+        stderr=subprocess.STDOUT, universal_newlines=True)
+    try:
+        with open(summary_path) as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        summary = {"file": filepath, "status": 'FAILED', 
+            "error": process.stdout[-2000:]}
+    return process.returncode, summary
+
+def cli_run_pool(args):
+    from concurrent.futures import ThreadPoolExecutor
+    
+    if args.summary_dir:
+        os.makedirs(args.summary_dir, exist_ok=True)
+    files = [os.path.abspath(f) for f in args.files]
+
+    # the threads only wait for their Blender process
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for filepath, (returncode, summary) in zip(files, 
+                pool.map(lambda f: cli_run_file(args, f), files)):
+            if returncode or summary["status"] != 'OK':
+                failed += 1
+                print("FAILED %s: %s" % (filepath, summary.get("error", "")))
+            else:
+                keys = sum(len(o["selected"]) for o in summary["objects"])
+                print("%s %s (%s objects, %s shape keys selected)" % (
+                    "CHECKED" if args.dry_run else "DONE", 
+                    filepath, len(summary["objects"]), keys))
+    
+    print("%s of %s files processed" % (len(files) - failed, len(files)))
+    return 1 if failed else 0
+
+def cli_main(argv):
+    args = cli_parse_args(argv)
+    if args.worker:
+        cli_run_worker(args)
+    elif args.files:
+        sys.exit(cli_run_pool(args))
+    else:
+        register()
+
+
+if __name__ == "__main__":
+    if "--" in sys.argv:
+        cli_main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        register()
@@ -0,0 +1,179 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Tests of the Shape Key Extras helpers, run in background mode
+#
+#   blender -b --factory-startup --python-exit-code 1 --python tests/test_shape_key_extras.py
+
+import bpy
+import numpy as np
+
+import importlib.util
+import os
+import sys
+import unittest
+
+ADDON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shape-key-extras.py")
+
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location("shape_key_extras", ADDON_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+ske_module = load_addon()
+
+
+def new_object(name, co):
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", np.asarray(co, dtype=np.float32).ravel())
+    mesh.update()
+    ob = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(ob)
+    return ob
+
+def remove_object(ob):
+    mesh = ob.data
+    bpy.data.objects.remove(ob)
+    bpy.data.meshes.remove(mesh)
+
+def add_key(ob, name, co, relative_key=None):
+    key_block = ob.shape_key_add(name=name, from_mix=False)
+    key_block.data.foreach_set("co", np.asarray(co, dtype=np.float32).ravel())
+    if relative_key is not None:
+        key_block.relative_key = relative_key
+    return key_block
+
+def key_coords(key_block):
+    co = np.empty(len(key_block.data) * 3, dtype=np.float32)
+    key_block.data.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+class DeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.basis = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0)], dtype=np.float32)
+        self.ob = new_object("Deltas", self.basis)
+        basis = add_key(self.ob, "Basis", self.basis)
+        self.a = self.basis + (0, 0, 1)
+        self.b = self.a + np.array([(1, 0, 0), (0, 0, 0), (0, 2, 0), (0, 0, 4)], dtype=np.float32)
+        add_key(self.ob, "A", self.a, basis)
+        add_key(self.ob, "B", self.b, self.ob.data.shape_keys.key_blocks["A"])
+
+    def tearDown(self):
+        remove_object(self.ob)
+
+    def test_scale_key_and_relative_key(self):
+        # B is relative to A, both are scaled by their own offsets
+        new_a = self.basis + (self.a - self.basis) * 0.5
+        new_b = new_a + (self.b - self.a) * 0.5
+        key_blocks = self.ob.data.shape_keys.key_blocks
+        for order in ((1, 2), (2, 1)):
+            with self.subTest(order=order):
+                key_blocks["A"].data.foreach_set("co", self.a.ravel())
+                key_blocks["B"].data.foreach_set("co", self.b.ravel())
+                ske_module.scale_shape_key_deltas(self.ob, np.array(order), 0.5)
+                np.testing.assert_allclose(key_coords(key_blocks["A"]), new_a)
+                np.testing.assert_allclose(key_coords(key_blocks["B"]), new_b)
+
+    def test_mask_key_and_relative_key(self):
+        mask = np.array([1, 0, 1, 0], dtype=np.float32)
+        new_a = self.basis + (self.a - self.basis) * mask[:, None]
+        new_b = new_a + (self.b - self.a) * mask[:, None]
+        key_blocks = self.ob.data.shape_keys.key_blocks
+        ske_module.mask_shape_key_deltas(self.ob, np.array((2, 1)), mask)
+        np.testing.assert_allclose(key_coords(key_blocks["A"]), new_a)
+        np.testing.assert_allclose(key_coords(key_blocks["B"]), new_b)
+
+
+class MergeVertexGroupsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        ske_module.register()
+
+    @classmethod
+    def tearDownClass(cls):
+        ske_module.unregister()
+
+    def setUp(self):
+        # painted weights that are all different, vertex 4 is in no group
+        rng = np.random.RandomState(0)
+        self.ob = new_object("Merge", rng.uniform(-1, 1, (6, 3)))
+        self.weights = {}
+        for name, verts in (("A", (0, 1, 2, 3)), ("B", (1, 2, 5)), ("C", (0, 2, 5))):
+            vgroup = self.ob.vertex_groups.new(name=name)
+            for v in verts:
+                weight = float(rng.uniform(0.05, 0.95))
+                vgroup.add([v], weight, 'REPLACE')
+                self.weights.setdefault(v, []).append(np.float32(weight))
+        
+        context = bpy.context
+        context.view_layer.objects.active = self.ob
+        collection = context.scene.shape_key_extras_collection
+        collection.clear()
+        for name in ("A", "B", "C"):
+            collection.add().name = name
+
+    def tearDown(self):
+        bpy.context.scene.shape_key_extras_collection.clear()
+        remove_object(self.ob)
+
+    def reference(self, mode):
+        # reduced per vertex in float32, like the weights are stored
+        result = {}
+        for v, weights in self.weights.items():
+            if mode == 'MAX':
+                value = max(weights)
+            elif mode == 'MULTIPLY':
+                value = np.float32(0)
+                if len(weights) == 3:
+                    value = weights[0] * weights[1] * weights[2]
+            else:
+                value = np.float32(0)
+                for weight in weights:
+                    value += weight
+                if mode == 'AVERAGE':
+                    value /= np.float32(3)
+            result[v] = value
+        if mode == 'NORMALIZE':
+            top = max(result.values())
+            result = {v: value / top for v, value in result.items()}
+        return {v: float(np.clip(value, 0, 1)) for v, value in result.items() if value > 0}
+
+    def test_exact_weights(self):
+        for mode in ('SUM', 'MAX', 'AVERAGE', 'MULTIPLY', 'NORMALIZE'):
+            with self.subTest(mode=mode):
+                bpy.context.scene.shape_key_extras.vg_merge_mode = mode
+                self.assertEqual(bpy.ops.shapekeyextras.merge_vg_ui_list(), {'FINISHED'})
+                vgroup = self.ob.vertex_groups["A+B+C"]
+                merged = {v.index: g.weight for v in self.ob.data.vertices 
+                    for g in v.groups if g.group == vgroup.index}
+                expected = self.reference(mode)
+                self.assertEqual(sorted(merged), sorted(expected))
+                for v, weight in expected.items():
+                    self.assertAlmostEqual(merged[v], weight, places=6)
+                self.ob.vertex_groups.remove(vgroup)
+
+
+if __name__ == "__main__":
+    result = unittest.main(argv=[sys.argv[0]], exit=False).result
+    sys.exit(not result.wasSuccessful())